@@ -5,8 +5,19 @@ load_dotenv()
 
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:3000").split(",")
 DB_PATH = os.getenv("DB_PATH", "data/competitions.json")
+# "json" (TinyDB) or "sqlite" (see sqlite_store.py)
+DB_STORAGE = os.getenv("DB_STORAGE", "sqlite" if DB_PATH.endswith((".db", ".sqlite")) else "json")
+STORAGE_READ_WORKERS = int(os.getenv("STORAGE_READ_WORKERS", "4"))
 SERVICE_NAME = os.getenv("SERVICE_NAME", "competitionsService - TinyDB")
 TEAMS_BASE_URL = os.getenv("TEAMS_BASE_URL", "http://localhost:8001")
 MATCHES_BASE_URL = os.getenv("MATCHES_BASE_URL", "http://localhost:8003")
 API_PREFIX = os.getenv("API_PREFIX", "/api/v1")
 PORT = int(os.getenv("PORT", 8002))
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "3.0"))
+# shared HTTP pool for calls to other services; timeouts per dependency
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30.0"))
+TEAMS_TIMEOUT = float(os.getenv("TEAMS_TIMEOUT", REQUEST_TIMEOUT))
+# change notifications for caching services: redis://... or memory:// (in-process)
+CHANGE_FEED_URL = os.getenv("CHANGE_FEED_URL", "memory://")
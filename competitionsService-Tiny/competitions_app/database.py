@@ -1,3 +1,13 @@
 from tinydb import TinyDB
-db = TinyDB("data/competitions.json")
+from .config import DB_PATH, DB_STORAGE, STORAGE_READ_WORKERS
+from .executor import StorageExecutor
+from .sqlite_store import SQLiteDB
+from .storage import CachedJSONStorage, SharedTable
+
+if DB_STORAGE == "sqlite":
+    db = SQLiteDB(DB_PATH)
+else:
+    db = TinyDB(DB_PATH, storage=CachedJSONStorage)
+    db.table_class = SharedTable
+db_executor = StorageExecutor(STORAGE_READ_WORKERS)
 competitions_table = db.table("competitions")
@@ -0,0 +1,66 @@
+"""In-memory indexes kept alongside TinyDB tables."""
+from typing import Any, Dict, Optional
+
+from tinydb.table import Document, Table
+
+
+class IdIndex:
+    """Maps a unique document field (``id`` by default) to its TinyDB doc_id.
+
+    Lookups go straight to ``table.get(doc_id=...)`` instead of scanning the
+    table with ``Query().id == x``. The index is rebuilt whenever the storage
+    reloads the file from disk, or when an entry turns out to be stale.
+
+    On the SQLite backend (a table with ``find_ids``) the lookup is a query on
+    an expression index instead, and nothing is kept in memory.
+    """
+
+    def __init__(self, table: Table, field: str = "id"):
+        self._table = table
+        self._field = field
+        self._ids: Dict[Any, int] = {}
+        self._reloads = -1
+        self._native = hasattr(table, "find_ids")
+        if self._native:
+            table.ensure_index(field)
+        else:
+            self.rebuild()
+
+    def rebuild(self):
+        if self._native:
+            return
+        self._ids = {doc[self._field]: doc.doc_id for doc in self._table.all() if self._field in doc}
+        self._reloads = getattr(self._table.storage, "reloads", 0)
+
+    def _sync(self):
+        self._table.storage.read()
+        if getattr(self._table.storage, "reloads", 0) != self._reloads:
+            self.rebuild()
+
+    def doc_id(self, key: Any) -> Optional[int]:
+        if self._native:
+            found = self._table.find_ids((self._field,), key)
+            return found[0] if found else None
+        self._sync()
+        return self._ids.get(key)
+
+    def get(self, key: Any) -> Optional[Document]:
+        doc_id = self.doc_id(key)
+        if doc_id is None:
+            return None
+        doc = self._table.get(doc_id=doc_id)
+        if doc is None or doc.get(self._field) != key:
+            self.rebuild()
+            doc_id = self._ids.get(key)
+            doc = self._table.get(doc_id=doc_id) if doc_id is not None else None
+        return doc
+
+    def add(self, key: Any, doc_id: int):
+        if not self._native:
+            self._ids[key] = doc_id
+
+    def discard(self, key: Any):
+        self._ids.pop(key, None)
+
+    def __len__(self):
+        return len(self._table) if self._native else len(self._ids)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 class CompetitionIn(BaseModel):
     name: str
@@ -11,3 +11,6 @@ class CompetitionIn(BaseModel):
 class CompetitionOut(CompetitionIn):
     id: str
     createdAt: str
+
+class BatchGetIn(BaseModel):
+    ids: List[str] = Field(..., max_length=500, description="Competition IDs to fetch")
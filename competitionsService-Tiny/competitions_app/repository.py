@@ -1,30 +1,52 @@
-import json
-from tinydb import Query
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from .database import competitions_table
+from .encoding import to_jsonable
+from .index import IdIndex
 
 class CompetitionsRepository:
     def __init__(self):
         self.table = competitions_table
+        self._by_id = IdIndex(self.table)
 
     def insert(self, doc: Dict[str, Any]):
-        serializable = json.loads(json.dumps(doc, default=str))
-        self.table.insert(serializable)
+        serializable = to_jsonable(doc)
+        doc_id = self.table.insert(serializable)
+        self._by_id.add(serializable.get("id"), doc_id)
         return serializable
 
     def get(self, comp_id: str) -> Optional[Dict[str, Any]]:
-        res = self.table.search(Query().id == comp_id)
-        return res[0] if res else None
+        return self._by_id.get(comp_id)
+
+    def get_many(self, comp_ids: List[str]) -> Dict[str, List[Any]]:
+        found, missing = [], []
+        for comp_id in dict.fromkeys(comp_ids):
+            doc = self._by_id.get(comp_id)
+            if doc:
+                found.append(doc)
+            else:
+                missing.append(comp_id)
+        return {"found": found, "missing": missing}
 
     def update(self, comp_id: str, patch: Dict[str, Any]):
-        if not self.get(comp_id):
-            return None
-        serializable_patch = json.loads(json.dumps(patch, default=str))
-        self.table.update(serializable_patch, Query().id == comp_id)
-        return self.get(comp_id)
+        with self.table.storage.transaction():
+            doc_id = self._by_id.doc_id(comp_id)
+            if doc_id is None:
+                return None
+            serializable_patch = to_jsonable(patch)
+            self.table.update(serializable_patch, doc_ids=[doc_id])
+            new_id = serializable_patch.get("id", comp_id)
+            if new_id != comp_id:
+                self._by_id.discard(comp_id)
+                self._by_id.add(new_id, doc_id)
+            return self.table.get(doc_id=doc_id)
 
     def remove(self, comp_id: str) -> bool:
-        return bool(self.table.remove(Query().id == comp_id))
+        with self.table.storage.transaction():
+            doc_id = self._by_id.doc_id(comp_id)
+            if doc_id is None:
+                return False
+            self._by_id.discard(comp_id)
+            return bool(self.table.remove(doc_ids=[doc_id]))
 
     def list(self, q: Optional[str] = None, sport: Optional[str] = None, limit: int = 100, offset: int = 0):
         items = self.table.all()
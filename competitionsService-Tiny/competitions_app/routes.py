@@ -1,12 +1,14 @@
-import httpx
 from fastapi import APIRouter, HTTPException, Query, status
 from uuid import uuid4
 from datetime import datetime, timezone
 from typing import Optional
 
-from .models import CompetitionIn, CompetitionOut
+from .models import BatchGetIn, CompetitionIn, CompetitionOut
 from .repository import CompetitionsRepository
 from .config import TEAMS_BASE_URL
+from .database import db_executor
+from .change_feed import change_feed
+from .http_client import http_client
 
 router = APIRouter()
 repo = CompetitionsRepository()
@@ -15,8 +17,7 @@ VALID_SPORTS = ["futsal", "basquete", "volei", "handebol", "futebol"]
 
 
 async def check_team_exists(team_id: str):
-    async with httpx.AsyncClient(timeout=3.0) as client:
-        r = await client.get(f"{TEAMS_BASE_URL}/api/v1/teams/{team_id}")
+    r = await http_client.get("teams", f"{TEAMS_BASE_URL}/api/v1/teams/{team_id}")
     if r.status_code != 200:
         raise HTTPException(400, f"Team '{team_id}' not found")
 
@@ -41,11 +42,19 @@ async def create_competition(comp: CompetitionIn):
     doc["id"] = f"COMP_{uuid4().hex[:8].upper()}"
     doc["createdAt"] = datetime.now(timezone.utc).isoformat()
 
-    return repo.insert(doc)
+    created = await db_executor.write(repo.insert, doc)
+    await change_feed.publish("competitions", "created", created["id"])
+    return created
+
+@router.post("/api/v1/competitions:batchGet", summary="Fetch several competitions by ID")
+async def batch_get_competitions(body: BatchGetIn):
+    res = await db_executor.read(repo.get_many, body.ids)
+    return {"data": res["found"], "missing": res["missing"]}
+
 
 @router.get("/api/v1/competitions/{comp_id}", response_model=CompetitionOut)
 async def get_competition(comp_id: str):
-    comp = repo.get(comp_id)
+    comp = await db_executor.read(repo.get, comp_id)
     if not comp:
         raise HTTPException(status_code=404, detail="Competition not found")
     return comp
@@ -56,4 +65,4 @@ async def list_competitions(sport: Optional[str] = Query(None, description="Filt
             status_code=400,
             detail=f"Invalid sport '{sport}'. Valid options: {VALID_SPORTS}"
         )
-    return repo.list(sport=sport)
\ No newline at end of file
+    return await db_executor.read(repo.list, sport=sport)
\ No newline at end of file
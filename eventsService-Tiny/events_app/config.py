@@ -5,8 +5,23 @@ load_dotenv()
 
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:3000").split(",")
 DB_PATH = os.getenv("DB_PATH", "data/events.json")
+# "json" (whole-file TinyDB JSON), "log" (append-only, see storage.LogStorage)
+# or "sqlite" (see sqlite_store.py)
+DB_STORAGE = os.getenv("DB_STORAGE", "log" if DB_PATH.endswith(".log") else "sqlite" if DB_PATH.endswith((".db", ".sqlite")) else "json")
+LOG_COMPACT_THRESHOLD = int(os.getenv("LOG_COMPACT_THRESHOLD", "10000"))
+STORAGE_READ_WORKERS = int(os.getenv("STORAGE_READ_WORKERS", "4"))
 SERVICE_NAME = os.getenv("SERVICE_NAME", "eventsService - TinyDB")
 MATCH_DETAIL_BASE_URL = os.getenv("MATCH_DETAIL_BASE_URL", "http://localhost:8004")
 REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "3.0"))
+# shared HTTP pool for calls to other services; timeouts per dependency
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30.0"))
+MATCH_DETAIL_TIMEOUT = float(os.getenv("MATCH_DETAIL_TIMEOUT", REQUEST_TIMEOUT))
 PORT = int(os.getenv("PORT", 8006))
 BROADCAST_PATH = os.getenv("BROADCAST_PATH", "/broadcast/event.created")
+BROADCAST_BATCH_PATH = os.getenv("BROADCAST_BATCH_PATH", "/broadcast/events.created")
+# most events accepted by one POST .../events:batch
+EVENTS_BATCH_LIMIT = int(os.getenv("EVENTS_BATCH_LIMIT", "500"))
+# sent as x-api-key; must be one of matchDetailService's API_KEYS
+MATCH_DETAIL_API_KEY = os.getenv("MATCH_DETAIL_API_KEY", "local-dev-key")
@@ -1,5 +1,16 @@
 from tinydb import TinyDB
-from .config import DB_PATH
+from .config import DB_PATH, DB_STORAGE, LOG_COMPACT_THRESHOLD, STORAGE_READ_WORKERS
+from .executor import StorageExecutor
+from .sqlite_store import SQLiteDB
+from .storage import CachedJSONStorage, LogStorage, LogTable, SharedTable
 
-db = TinyDB(DB_PATH)
+if DB_STORAGE == "sqlite":
+    db = SQLiteDB(DB_PATH, indexes={"events": ("matchId",)})
+elif DB_STORAGE == "log":
+    db = TinyDB(DB_PATH, storage=LogStorage, compact_threshold=LOG_COMPACT_THRESHOLD)
+    db.table_class = LogTable
+else:
+    db = TinyDB(DB_PATH, storage=CachedJSONStorage)
+    db.table_class = SharedTable
+db_executor = StorageExecutor(STORAGE_READ_WORKERS)
 events_table = db.table("events")
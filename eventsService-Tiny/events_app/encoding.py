@@ -0,0 +1,78 @@
+"""Single-pass conversion of documents into JSON-safe values.
+
+Replaces the ``json.loads(json.dumps(doc, default=str))`` round-trip the
+repositories used before storing a document, without building and re-parsing
+an intermediate string. The result is a deep copy made of dicts, lists, str,
+int, float, bool and None. For most values it is the same as the round-trip:
+tuples become lists, non-str keys are converted like ``json.dumps`` does, and
+anything unknown (datetimes, URLs, UUIDs, ...) becomes ``str(value)``.
+
+Two cases differ on purpose:
+
+- sets and frozensets become lists (in iteration order), where the round-trip
+  stored their ``str()``, e.g. ``"{1, 2}"``;
+- pydantic models are converted with ``model_dump(mode="json")``, where the
+  round-trip stored their ``str()`` as well.
+"""
+from typing import Any, Callable, Dict
+
+from pydantic import BaseModel
+
+_SCALARS = frozenset((str, int, float, bool, type(None)))
+
+
+def _key(key: Any) -> str:
+    if isinstance(key, str):
+        return str.__str__(key)
+    if key is None:
+        return "null"
+    if isinstance(key, bool):
+        return "true" if key else "false"
+    if isinstance(key, float):
+        return repr(key)
+    if isinstance(key, int):
+        return str(int(key))
+    return str(key)
+
+
+def _dict(value) -> Dict[str, Any]:
+    return {
+        (k if type(k) is str else _key(k)): (v if type(v) in _SCALARS else to_jsonable(v))
+        for k, v in value.items()
+    }
+
+
+def _list(value) -> list:
+    return [v if type(v) in _SCALARS else to_jsonable(v) for v in value]
+
+
+def _resolve(cls: type) -> Callable[[Any], Any]:
+    if issubclass(cls, BaseModel):
+        return lambda v: v.model_dump(mode="json")
+    if issubclass(cls, dict):
+        return _dict
+    if issubclass(cls, (list, tuple, set, frozenset)):
+        return _list
+    if issubclass(cls, bool):
+        return bool
+    if issubclass(cls, str):
+        return str.__str__
+    if issubclass(cls, int):
+        return int
+    if issubclass(cls, float):
+        return float
+    # datetimes, URLs, UUIDs, ...: same as json.dumps(default=str)
+    return str
+
+
+_HANDLERS: Dict[type, Callable[[Any], Any]] = {dict: _dict, list: _list, tuple: _list}
+
+
+def to_jsonable(value: Any) -> Any:
+    cls = type(value)
+    if cls in _SCALARS:
+        return value
+    handler = _HANDLERS.get(cls)
+    if handler is None:
+        handler = _HANDLERS[cls] = _resolve(cls)
+    return handler(value)
@@ -1,23 +1,29 @@
-import json
 from typing import List, Dict, Any
 from tinydb import Query
 
 from .database import events_table
+from .encoding import to_jsonable
 
 class EventsRepository:
     def __init__(self):
         self._table = events_table
 
     def _serialize(self, doc: Dict[str, Any]) -> Dict[str, Any]:
-        return json.loads(json.dumps(doc, default=str, ensure_ascii=False))
+        return to_jsonable(doc)
 
     def insert(self, event: Dict[str, Any]) -> Dict[str, Any]:
         serialized = self._serialize(event)
         self._table.insert(serialized)
         return serialized
 
+    def insert_many(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # one storage write for the whole batch
+        serialized = [self._serialize(event) for event in events]
+        self._table.insert_multiple(serialized)
+        return serialized
+
     def list_by_match(self, match_id: str) -> List[Dict[str, Any]]:
-        results = self._table.search(Query().matchId == match_id)
-        return [self._serialize(doc) for doc in results]
+        # documents were made JSON-safe when stored; return them as they are
+        return self._table.search(Query().matchId == match_id)
 
 repo = EventsRepository()
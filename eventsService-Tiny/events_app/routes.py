@@ -1,31 +1,38 @@
+import json
 import logging
 from datetime import datetime, timezone
-from typing import List
+from typing import Annotated, List
 from uuid import uuid4
 
 import httpx
-from fastapi import APIRouter, status
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import Field, TypeAdapter, ValidationError
 
-from .config import MATCH_DETAIL_BASE_URL, REQUEST_TIMEOUT, BROADCAST_PATH
+from .config import MATCH_DETAIL_API_KEY, MATCH_DETAIL_BASE_URL, BROADCAST_PATH, BROADCAST_BATCH_PATH, EVENTS_BATCH_LIMIT
+from .database import db_executor
+from .http_client import http_client
 from .models import EventCreate, EventOut
 from .repository import repo
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl")
+_event_batch = TypeAdapter(Annotated[List[EventCreate], Field(min_length=1, max_length=EVENTS_BATCH_LIMIT)])
+
 
 @router.get("/", summary="Service info")
 async def root():
     return {"service": "eventsService", "status": "ok"}
 
 
-async def _notify_match_detail(event_payload: dict):
-    url = f"{MATCH_DETAIL_BASE_URL.rstrip('/')}{BROADCAST_PATH}"
+async def _notify_match_detail(event_payload, path: str = BROADCAST_PATH):
+    url = f"{MATCH_DETAIL_BASE_URL.rstrip('/')}{path}"
     try:
-        async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT) as client:
-            response = await client.post(url, json=event_payload)
-            if response.status_code >= 400:
-                logger.warning("matchDetailService broadcast responded with %s: %s", response.status_code, response.text)
+        response = await http_client.post("matchDetail", url, json=event_payload, headers={"x-api-key": MATCH_DETAIL_API_KEY})
+        if response.status_code >= 400:
+            logger.warning("matchDetailService broadcast responded with %s: %s", response.status_code, response.text)
     except httpx.RequestError as exc:
         logger.warning("Could not notify matchDetailService: %s", exc)
 
@@ -41,15 +48,47 @@ async def create_event(match_id: str, payload: EventCreate):
     doc["id"] = str(uuid4())
     doc["matchId"] = match_id
     doc["createdAt"] = datetime.now(timezone.utc)
-    saved = repo.insert(doc)
+    saved = await db_executor.write(repo.insert, doc)
     await _notify_match_detail(saved)
     return saved
 
 
+async def _read_batch(request: Request) -> List[EventCreate]:
+    """Body as a JSON array or, for NDJSON content types, one event per line."""
+    body = await request.body()
+    try:
+        if request.headers.get("content-type", "").split(";")[0].strip() in NDJSON_TYPES:
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    try:
+        return _event_batch.validate_python(items)
+    except ValidationError as e:
+        raise RequestValidationError([dict(err, loc=("body", *err["loc"])) for err in e.errors()])
+
+
+@router.post(
+    "/api/v1/matches/{match_id}/events:batch",
+    response_model=List[EventOut],
+    status_code=status.HTTP_201_CREATED,
+    summary="Create several match events at once",
+)
+async def create_events(match_id: str, request: Request):
+    # all or nothing: nothing is stored unless every event is valid
+    events = await _read_batch(request)
+    now = datetime.now(timezone.utc)
+    docs = [dict(event.model_dump(), id=str(uuid4()), matchId=match_id, createdAt=now) for event in events]
+    saved = await db_executor.write(repo.insert_many, docs)
+    await _notify_match_detail(saved, BROADCAST_BATCH_PATH)
+    return saved
+
+
 @router.get(
     "/api/v1/matches/{match_id}/events",
     response_model=List[EventOut],
     summary="List events for a match",
 )
 async def list_events(match_id: str):
-    return repo.list_by_match(match_id)
+    return await db_executor.read(repo.list_by_match, match_id)
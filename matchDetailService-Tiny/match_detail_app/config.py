@@ -14,14 +14,44 @@ class Settings:
 	def __init__(self):
 		self.cors_origins = _csv(os.getenv("CORS_ORIGINS"), "http://localhost:5173,http://localhost:3000")
 		self.db_path = os.getenv("DB_PATH", "data/match_details.json")
+		# json | log (storage.LogStorage) | sqlite (sqlite_store.py)
+		self.db_storage = os.getenv("DB_STORAGE", "log" if self.db_path.endswith(".log") else "sqlite" if self.db_path.endswith((".db", ".sqlite")) else "json")
+		self.log_compact_threshold = int(os.getenv("LOG_COMPACT_THRESHOLD", "10000"))
+		self.storage_read_workers = int(os.getenv("STORAGE_READ_WORKERS", "4"))
 		self.service_name = os.getenv("SERVICE_NAME", "matchDetailService - TinyDB")
 		self.matches_base_url = os.getenv("MATCHES_BASE_URL", "http://localhost:8003")
 		self.teams_base_url = os.getenv("TEAMS_BASE_URL", "http://localhost:8001")
 		self.competitions_base_url = os.getenv("COMPETITIONS_BASE_URL", "http://localhost:8002")
 		self.players_base_url = os.getenv("PLAYERS_BASE_URL", "http://localhost:8005")
 		self.request_timeout = float(os.getenv("REQUEST_TIMEOUT", "3.0"))
+		self.http_max_connections = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+		self.http_max_keepalive = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+		self.http_keepalive_expiry = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30.0"))
+		self.matches_timeout = float(os.getenv("MATCHES_TIMEOUT", self.request_timeout))
+		self.teams_timeout = float(os.getenv("TEAMS_TIMEOUT", self.request_timeout))
+		self.competitions_timeout = float(os.getenv("COMPETITIONS_TIMEOUT", self.request_timeout))
+		self.detail_deadline = float(os.getenv("DETAIL_DEADLINE", "2.0"))
+		self.snapshot_ttl = float(os.getenv("SNAPSHOT_TTL", "300"))
+		self.snapshot_max_matches = int(os.getenv("SNAPSHOT_MAX_MATCHES", "1000"))
+		# matches without live clients here miss updates made on other instances: keep their snapshot briefly
+		self.snapshot_unfollowed_ttl = float(os.getenv("SNAPSHOT_UNFOLLOWED_TTL", "5"))
 		self.port = int(os.getenv("PORT", 8004))
 		self.redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+		# tags this instance's Redis messages (origin); must differ per instance, random when unset
+		self.instance_id = os.getenv("INSTANCE_ID") or None
+		# per WebSocket client; when full: drop_oldest | snapshot | disconnect
+		self.ws_send_queue = int(os.getenv("WS_SEND_QUEUE", "256"))
+		self.ws_slow_client_policy = os.getenv("WS_SLOW_CLIENT_POLICY", "drop_oldest")
+		# matches one /ws/live connection may subscribe to
+		self.ws_live_max_matches = int(os.getenv("WS_LIVE_MAX_MATCHES", "100"))
+		# events accepted by one POST .../events:batch
+		self.events_batch_limit = int(os.getenv("EVENTS_BATCH_LIMIT", "500"))
+		# per SSE client; when full, stats/lineups/match updates are merged
+		self.sse_send_queue = int(os.getenv("SSE_SEND_QUEUE", "256"))
+		# recent messages kept per match for clients resuming with Last-Event-ID / ?since= (0 disables)
+		self.replay_buffer_size = int(os.getenv("REPLAY_BUFFER_SIZE", "256"))
+		# send stats/lineups changes as *.delta (changed fields + version) instead of the whole document
+		self.realtime_deltas = os.getenv("REALTIME_DELTAS", "false").lower() in ("1", "true", "yes")
 		self.jwt_secret = os.getenv("JWT_SECRET", "change-me")
 		self.jwt_algorithm = os.getenv("JWT_ALGORITHM", "HS256")
 		self.api_keys = _csv(os.getenv("API_KEYS", "local-dev-key"))
@@ -37,6 +67,9 @@ settings = get_settings()
 # Backwards compatible constants
 CORS_ORIGINS = settings.cors_origins
 DB_PATH = settings.db_path
+DB_STORAGE = settings.db_storage
+LOG_COMPACT_THRESHOLD = settings.log_compact_threshold
+STORAGE_READ_WORKERS = settings.storage_read_workers
 SERVICE_NAME = settings.service_name
 
 MATCHES_BASE_URL = settings.matches_base_url
@@ -45,4 +78,14 @@ COMPETITIONS_BASE_URL = settings.competitions_base_url
 PLAYERS_BASE_URL = settings.players_base_url
 
 REQUEST_TIMEOUT = settings.request_timeout
+HTTP_MAX_CONNECTIONS = settings.http_max_connections
+HTTP_MAX_KEEPALIVE = settings.http_max_keepalive
+HTTP_KEEPALIVE_EXPIRY = settings.http_keepalive_expiry
+MATCHES_TIMEOUT = settings.matches_timeout
+TEAMS_TIMEOUT = settings.teams_timeout
+COMPETITIONS_TIMEOUT = settings.competitions_timeout
+DETAIL_DEADLINE = settings.detail_deadline
+SNAPSHOT_TTL = settings.snapshot_ttl
+SNAPSHOT_MAX_MATCHES = settings.snapshot_max_matches
+SNAPSHOT_UNFOLLOWED_TTL = settings.snapshot_unfollowed_ttl
 PORT = settings.port
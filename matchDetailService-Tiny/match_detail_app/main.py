@@ -4,14 +4,24 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from .config import settings
-from .routes import router, manager, broadcaster
+from .database import db, db_executor
+from .executor import LoopLagMonitor
+from .http_client import http_client
+from .routes import router, manager, broadcaster, snapshots
+
+loop_lag = LoopLagMonitor()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-	await broadcaster.start(manager)
+	loop_lag.start()
+	await http_client.start()
+	await broadcaster.start(manager, on_message=snapshots.apply, on_follow=snapshots.follow)
 	yield
 	await broadcaster.stop()
+	await http_client.aclose()
+	await loop_lag.stop()
+	db_executor.shutdown()
 
 
 app = FastAPI(title=settings.service_name, lifespan=lifespan)
@@ -22,3 +32,9 @@ app.add_middleware(
 	allow_headers=["*"],
 )
 app.include_router(router)
+
+
+@app.get("/metrics", summary="Storage, event loop, HTTP pool, snapshot, realtime fan-out and Redis counters")
+async def metrics():
+	return {"storage": db.storage.stats(), "executor": db_executor.stats(), "loopLag": loop_lag.stats(), "http": http_client.stats(), "snapshots": snapshots.stats(),
+		"realtime": manager.stats(), "realtimeByMatch": manager.queue_depths(), "broadcaster": broadcaster.stats()}
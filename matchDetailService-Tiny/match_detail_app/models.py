@@ -1,6 +1,6 @@
 
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Literal
+from typing import Any, Optional, List, Dict, Literal
 from datetime import datetime
 
 Status = Literal["SCHEDULED", "LIVE", "FINISHED"]
@@ -35,6 +35,20 @@ class Event(BaseModel):
     teamId: Optional[str] = None
     meta: Dict[str, str] = {}
 
+class EventNotice(BaseModel):
+    """Event as eventsService posts it after storing it (its EventOut)."""
+    id: str
+    matchId: str
+    type: str
+    minute: Optional[int] = None
+    playerId: Optional[str] = None
+    teamId: Optional[str] = None
+    meta: Optional[Dict[str, Any]] = None
+
+    def to_event(self) -> Event:
+        return Event(id=self.id, minute=self.minute or 0, type=self.type, playerId=self.playerId, teamId=self.teamId,
+                     meta={k: str(v) for k, v in (self.meta or {}).items()})
+
 class LineupItem(BaseModel):
     playerId: str
     name: Optional[str] = None
@@ -44,6 +58,8 @@ class LineupItem(BaseModel):
 class Lineups(BaseModel):
     home: List[LineupItem] = []
     away: List[LineupItem] = []
+    # set by the service, +1 per write (see stats.delta/lineups.delta)
+    version: Optional[int] = None
 
 class TeamStats(BaseModel):
     score: int = 0
@@ -63,6 +79,13 @@ class Stats(BaseModel):
     home: TeamStats = TeamStats()
     away: TeamStats = TeamStats()
     players: List[PlayerStat] = []
+    version: Optional[int] = None
+
+class LiveCommand(BaseModel):
+    """Control message of /ws/live; ``since`` maps a match id to the last message id received for it."""
+    action: Literal["subscribe", "unsubscribe"]
+    matchIds: List[str]
+    since: Dict[str, str] = {}
 
 class MatchDetailOut(BaseModel):
     match: MatchMeta
@@ -72,3 +95,4 @@ class MatchDetailOut(BaseModel):
     events: List[Event] = []
     lineups: Lineups = Lineups()
     stats: Stats = Stats()
+    version: Optional[int] = None
@@ -3,17 +3,89 @@ from __future__ import annotations
 
 import asyncio
 import json
+import uuid
+from collections import OrderedDict, deque
 from dataclasses import dataclass, field
-from typing import Dict, Set
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
 
 from fastapi import WebSocket
 from redis.asyncio import Redis
 
+_RETRY_SECONDS = 1.0
+# connect, PUBLISH, SUBSCRIBE: a hung Redis fails them instead of stalling the caller
+_REDIS_TIMEOUT = 2.0
+_POLL_SECONDS = 1.0
+_INTEREST_TIMEOUT = 5.0
+
+
+def encode(message: dict) -> str:
+    """The one JSON text of a message, shared by every WebSocket, SSE frame and Redis."""
+    return json.dumps(message, separators=(",", ":"), default=str)
+
+
+def message_id(message: dict) -> Optional[str]:
+    """``origin:seq``: names a message on every instance (see RedisBroadcaster.stamp)."""
+    if message.get("origin") is None or message.get("seq") is None:
+        return None
+    return f"{message['origin']}:{message['seq']}"
+
+
+def sse_frame(data: str, event_id: Optional[str] = None) -> str:
+    # the browser sends the last id back as Last-Event-ID when it reconnects
+    return f"data: {data}\n\n" if event_id is None else f"id: {event_id}\ndata: {data}\n\n"
+
+
+class ReplayBuffer:
+    """The last ``size`` messages of each match, for clients that reconnect.
+
+    Entries are ``(message id, type, encoded message)`` in the order this
+    instance delivered them. At most ``max_matches`` matches are kept, the
+    one with the oldest message first out.
+    """
+
+    def __init__(self, size: int = 256, max_matches: int = 1000):
+        self.size = size
+        self.max_matches = max_matches
+        self._matches: OrderedDict[str, Deque[Tuple[Optional[str], str, str]]] = OrderedDict()
+
+    def append(self, match_id: str, message_id: Optional[str], kind: str, data: str):
+        if self.size <= 0:
+            return
+        buffer = self._matches.get(match_id)
+        if buffer is None:
+            buffer = self._matches[match_id] = deque(maxlen=self.size)
+        self._matches.move_to_end(match_id)
+        buffer.append((message_id, kind, data))
+        while len(self._matches) > self.max_matches:
+            self._matches.popitem(last=False)
+
+    def last_id(self, match_id: str) -> Optional[str]:
+        buffer = self._matches.get(match_id)
+        return buffer[-1][0] if buffer else None
+
+    def since(self, match_id: str, message_id: str) -> Optional[List[Tuple[Optional[str], str, str]]]:
+        """Messages after ``message_id``; None if it is no longer (or never was) buffered."""
+        buffer = self._matches.get(match_id, ())
+        for at in range(len(buffer) - 1, -1, -1):
+            if buffer[at][0] == message_id:
+                return list(buffer)[at + 1:]
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        return {"matches": len(self._matches), "messages": sum(len(buffer) for buffer in self._matches.values())}
+
 
 @dataclass(eq=False)
 class WSClient:
     websocket: WebSocket
-    match_id: str
+    # /ws/matches/{match_id}; None for /ws/live, which subscribes to matches one by one
+    match_id: Optional[str] = None
+    matches: Set[str] = field(default_factory=set)
+    # outbound messages not yet written to the socket (see ChannelManager)
+    pending: Deque[str] = field(default_factory=deque)
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    writer: asyncio.Task | None = None
+    closed: bool = False
 
     def __hash__(self):
         return hash(id(self.websocket))
@@ -22,77 +94,543 @@ class WSClient:
 @dataclass(eq=False)
 class SSEClient:
     match_id: str
-    queue: asyncio.Queue[str] = field(default_factory=asyncio.Queue)
+    # (message type, SSE frame) not yet streamed (see ChannelManager)
+    pending: Deque[Tuple[str, str]] = field(default_factory=deque)
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    closed: bool = False
 
     def __hash__(self):
-        return hash(id(self.queue))
+        return hash(id(self.wakeup))
+
+    async def get(self) -> Optional[str]:
+        """Next frame to stream; None once the client has been cut off."""
+        while not self.pending:
+            if self.closed:
+                return None
+            self.wakeup.clear()
+            await self.wakeup.wait()
+        return self.pending.popleft()[1]
+
+
+SLOW_CLIENT_POLICIES = ("drop_oldest", "snapshot", "disconnect")
+# each of these carries the whole state it describes: a newer one supersedes the rest
+STATE_MESSAGES = frozenset(("stats.updated", "lineups.updated", "match.updated"))
 
 
 class ChannelManager:
-    def __init__(self):
+    """Fans messages out to the WebSocket/SSE clients of each match.
+
+    ``broadcast`` only enqueues: every WebSocket client has its own queue of
+    at most ``queue_size`` messages and a writer task that drains it, so a
+    slow socket delays nobody else. When a client's queue is full,
+    ``slow_policy`` decides: ``drop_oldest`` discards its oldest queued
+    message, ``snapshot`` replaces the whole queue with the current snapshot
+    message of each of its matches (from ``snapshot(match_id)``; as
+    ``drop_oldest`` while any of them has none cached) and ``disconnect``
+    closes the socket.
+    A WebSocket client can subscribe to several matches (``subscribe``) and
+    still has one queue and one writer.
+
+    SSE clients have a queue of at most ``sse_queue_size`` messages. When it
+    is full, queued state messages (``STATE_MESSAGES``) are merged into the
+    newest of their type; ``event.created`` and deltas are never dropped, so
+    a client whose queue holds nothing else to merge is cut off instead (the
+    EventSource reconnects and starts again from a snapshot).
+
+    A message is encoded once per broadcast (or not at all when the caller
+    passes its text along) and every client queues the same string; SSE
+    clients share one frame built from it.
+
+    ``on_interest(match_id, True)`` is awaited when a match gets its first
+    client and ``on_interest(match_id, False)`` when its last one leaves,
+    outside the lock and for at most ``_INTEREST_TIMEOUT`` seconds.
+
+    Every message also goes into ``replay``. A client that registers with
+    the id of the last message it got (``since``) is sent just the messages
+    after it; only when that id has left the buffer does it need a snapshot.
+    """
+
+    def __init__(self, queue_size: int = 256, slow_policy: str = "drop_oldest",
+                 snapshot: Optional[Callable[[str], Optional[str]]] = None, sse_queue_size: int = 256,
+                 replay: Optional[ReplayBuffer] = None,
+                 on_interest: Optional[Callable[[str, bool], Awaitable[None]]] = None):
+        if slow_policy not in SLOW_CLIENT_POLICIES:
+            raise ValueError(f"slow_policy must be one of {SLOW_CLIENT_POLICIES}")
         self._ws: Dict[str, Set[WSClient]] = {}
         self._sse: Dict[str, Set[SSEClient]] = {}
         self._lock = asyncio.Lock()
+        self._closing: Set[asyncio.Task] = set()
+        self.queue_size = queue_size
+        self.sse_queue_size = sse_queue_size
+        self.slow_policy = slow_policy
+        self._snapshot = snapshot
+        self.replay = replay if replay is not None else ReplayBuffer()
+        self._on_interest = on_interest
+        self.dropped = 0
+        self.resyncs = 0
+        self.disconnects = 0
+        self.sse_merged = 0
+        self.sse_disconnects = 0
+        self.resumes = 0
+        self.resume_misses = 0
+        self.replayed = 0
+        self.interest_errors = 0
+
+    async def register_ws(self, client: WSClient, since: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+        """Start delivering to ``client`` (subscribed to ``client.match_id``, if set); see ``_resume``."""
+        client.writer = asyncio.create_task(self._write(client))
+        if client.match_id is None:
+            return False, None
+        return await self.subscribe(client, client.match_id, since)
 
-    async def register_ws(self, client: WSClient):
-        await self._add(self._ws, client.match_id, client)
+    async def subscribe(self, client: WSClient, match_id: str, since: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+        """Add ``match_id`` to what a registered WebSocket client receives; see ``_resume``."""
+        client.matches.add(match_id)
+        return await self._add(self._ws, match_id, client, since, lambda event_id, kind, data: self.send(client, data, match_id))
+
+    async def unsubscribe(self, client: WSClient, match_id: str):
+        client.matches.discard(match_id)
+        await self._remove(self._ws, match_id, client)
 
     async def unregister_ws(self, client: WSClient):
-        await self._remove(self._ws, client.match_id, client)
+        client.closed = True
+        for match_id in list(client.matches):
+            await self.unsubscribe(client, match_id)
+        if client.writer:
+            client.writer.cancel()
 
-    async def register_sse(self, client: SSEClient):
-        await self._add(self._sse, client.match_id, client)
+    async def register_sse(self, client: SSEClient, since: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+        return await self._add(self._sse, client.match_id, client, since,
+                               lambda event_id, kind, data: self.send_sse(client, kind, sse_frame(data, event_id)))
 
     async def unregister_sse(self, client: SSEClient):
         await self._remove(self._sse, client.match_id, client)
+        client.closed = True
+
+    def send(self, client: WSClient, data: str, match_id: Optional[str] = None):
+        """Queue ``data`` (a message of ``match_id``) for one client (never waits for the socket)."""
+        if client.closed:
+            return
+        if len(client.pending) >= self.queue_size:
+            if self.slow_policy == "disconnect":
+                self._disconnect(client)
+                return
+            latest = self._snapshots_of(client) if self.slow_policy == "snapshot" else None
+            if latest:
+                # the snapshots already include this message
+                self.resyncs += 1
+                self.dropped += len(client.pending)
+                client.pending = deque(latest.values())
+                if match_id in latest:
+                    client.wakeup.set()
+                    return
+            else:
+                # drop_oldest, or "snapshot" with a match that has none to resync from
+                client.pending.popleft()
+                self.dropped += 1
+        client.pending.append(data)
+        client.wakeup.set()
+
+    def _snapshots_of(self, client: WSClient) -> Optional[Dict[str, str]]:
+        """Cached snapshot of every match the client follows; None if any is missing.
 
-    async def broadcast(self, message: dict):
+        The queue holds messages of all its matches: replacing it leaves a
+        match without a snapshot with neither its messages nor a resync.
+        """
+        if not self._snapshot or not client.matches:
+            return None
+        latest = {}
+        for match in client.matches:
+            latest[match] = self._snapshot(match)
+            if latest[match] is None:
+                return None
+        return latest
+
+    def send_snapshot(self, client: WSClient, data: str):
+        """Queue ``data`` ahead of the messages already queued: they may be newer than the snapshot."""
+        if client.closed:
+            return
+        client.pending.appendleft(data)
+        client.wakeup.set()
+
+    def send_sse(self, client: SSEClient, kind: str, frame: str):
+        if client.closed:
+            return
+        if len(client.pending) >= self.sse_queue_size:
+            self._merge_states(client, kind)
+            if len(client.pending) >= self.sse_queue_size:
+                self.sse_disconnects += 1
+                client.closed = True
+                client.pending.clear()
+                client.wakeup.set()
+                return
+        client.pending.append((kind, frame))
+        client.wakeup.set()
+
+    def _merge_states(self, client: SSEClient, kind: str):
+        """Keep only the newest queued message of each state type (``kind`` is newer still)."""
+        seen = {kind} if kind in STATE_MESSAGES else set()
+        kept: Deque[Tuple[str, str]] = deque()
+        for queued_kind, data in reversed(client.pending):
+            if queued_kind in STATE_MESSAGES:
+                if queued_kind in seen:
+                    self.sse_merged += 1
+                    continue
+                seen.add(queued_kind)
+            kept.appendleft((queued_kind, data))
+        client.pending = kept
+
+    async def broadcast(self, message: dict, data: Optional[str] = None):
+        """Queue ``message`` for its match's clients; ``data`` is its ``encode()`` if already done."""
         match_id = message["matchId"]
-        data = json.dumps(message)
-        for client in list(self._ws.get(match_id, set())):
-            await client.websocket.send_text(data)
-        for client in list(self._sse.get(match_id, set())):
-            await client.queue.put(data)
+        data = data or encode(message)
+        kind, event_id = message.get("type"), message_id(message)
+        self.replay.append(match_id, event_id, kind, data)
+        ws, sse = self._ws.get(match_id), self._sse.get(match_id)
+        for client in list(ws or ()):
+            self.send(client, data, match_id)
+        if sse:
+            frame = sse_frame(data, event_id)
+            for client in list(sse):
+                self.send_sse(client, kind, frame)
+
+    async def _write(self, client: WSClient):
+        try:
+            while True:
+                while not client.pending:
+                    client.wakeup.clear()
+                    await client.wakeup.wait()
+                await client.websocket.send_text(client.pending.popleft())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # socket gone; the endpoint's receive loop unregisters the client
+            client.closed = True
+            client.pending.clear()
+
+    def _disconnect(self, client: WSClient):
+        self.disconnects += 1
+        client.closed = True
+        client.pending.clear()
+        if client.writer:
+            client.writer.cancel()
+        for match_id in client.matches:
+            bucket = self._ws.get(match_id)
+            if bucket:
+                bucket.discard(client)
+        task = asyncio.ensure_future(self._close(client))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close(client: WSClient):
+        try:
+            # 1013 "try again later": the client could not keep up
+            await asyncio.wait_for(client.websocket.close(code=1013), 5.0)
+        except Exception:
+            pass
 
-    async def _add(self, bucket, key, client):
+    def _watched(self, match_id: str) -> bool:
+        return bool(self._ws.get(match_id) or self._sse.get(match_id))
+
+    async def _add(self, bucket, key, client, since, deliver):
         async with self._lock:
+            first = not self._watched(key)
             bucket.setdefault(key, set()).add(client)
+            # no broadcast can slip in between: each message is either replayed or queued live
+            resumed = self._resume(key, since, deliver)
+        if first:
+            await self._interest(key, True)
+        return resumed
+
+    async def _interest(self, match_id: str, watching: bool):
+        # a network call (Redis SUBSCRIBE): outside the lock, so other matches' clients don't wait on it
+        if not self._on_interest:
+            return
+        try:
+            await asyncio.wait_for(self._on_interest(match_id, watching), _INTEREST_TIMEOUT)
+        except Exception:
+            self.interest_errors += 1
+
+    def _resume(self, match_id: str, since: Optional[str], deliver) -> Tuple[bool, Optional[str]]:
+        """Replay the buffered messages after ``since``; returns (resumed, id of the newest buffered message).
+
+        Not resumed (no ``since``, or it left the buffer): the caller sends a
+        snapshot, tagged with that id so the client can resume from it later.
+        """
+        missed = self.replay.since(match_id, since) if since else None
+        if missed is None:
+            if since:
+                self.resume_misses += 1
+            return False, self.replay.last_id(match_id)
+        for event_id, kind, data in missed:
+            deliver(event_id, kind, data)
+        self.resumes += 1
+        self.replayed += len(missed)
+        return True, self.replay.last_id(match_id)
 
     async def _remove(self, bucket, key, client):
         async with self._lock:
-            if key in bucket:
-                bucket[key].discard(client)
-                if not bucket[key]:
-                    bucket.pop(key)
+            if key not in bucket:
+                return
+            bucket[key].discard(client)
+            if bucket[key]:
+                return
+            bucket.pop(key)
+            last = not self._watched(key)
+        if last:
+            await self._interest(key, False)
+
+    def queue_depths(self) -> Dict[str, Dict[str, int]]:
+        """Clients and messages waiting to be sent, per match with subscribers."""
+        depths = {}
+        for match_id in set(self._ws) | set(self._sse):
+            ws, sse = self._ws.get(match_id, ()), self._sse.get(match_id, ())
+            depths[match_id] = {
+                "wsClients": len(ws),
+                "wsQueued": sum(len(client.pending) for client in ws),
+                "sseClients": len(sse),
+                "sseQueued": sum(len(client.pending) for client in sse),
+                "sseMaxQueued": max((len(client.pending) for client in sse), default=0),
+            }
+        return depths
+
+    def stats(self) -> Dict[str, int]:
+        clients = {client for bucket in self._ws.values() for client in bucket}
+        sse = [client for bucket in self._sse.values() for client in bucket]
+        return {
+            "wsClients": len(clients),
+            "wsSubscriptions": sum(len(bucket) for bucket in self._ws.values()),
+            "sseClients": len(sse),
+            "queued": sum(len(client.pending) for client in clients),
+            "maxQueued": max((len(client.pending) for client in clients), default=0),
+            "dropped": self.dropped,
+            "resyncs": self.resyncs,
+            "disconnects": self.disconnects,
+            "sseQueued": sum(len(client.pending) for client in sse),
+            "sseMaxQueued": max((len(client.pending) for client in sse), default=0),
+            "sseMerged": self.sse_merged,
+            "sseDisconnects": self.sse_disconnects,
+            "resumes": self.resumes,
+            "resumeMisses": self.resume_misses,
+            "replayed": self.replayed,
+            "interestErrors": self.interest_errors,
+            "replayBuffer": self.replay.stats(),
+        }
 
 
 class RedisBroadcaster:
-    """Publishes/consumes realtime messages using a shared Redis channel."""
+    """Publishes/consumes realtime messages over Redis, one channel per match.
+
+    Messages for a match go to ``<channel>:<matchId>``. An instance listens
+    only to the matches it has clients for: ``ChannelManager`` calls
+    ``set_interest`` when the first client of a match registers and when the
+    last one leaves, so its Pub/Sub traffic follows what its clients watch
+    rather than everything published.
 
-    def __init__(self, redis_url: str, channel: str = "match-detail-updates"):
-        self._redis = Redis.from_url(redis_url, decode_responses=True)
+    A match counts as followed only once its SUBSCRIBE went through:
+    ``on_follow(match_id, True)`` is called then, and ``on_follow(match_id,
+    False)`` when it is left or the connection drops. The listener reconnects
+    after any error and subscribes again to every match still wanted, so a
+    failed SUBSCRIBE is retried there as well.
+
+    Each instance has its own ``instance_id``. ``stamp`` tags an outgoing
+    message with it (``origin``) and with ``seq``, which grows by one per
+    message this instance sends for the match. The listener skips messages
+    from its own instance (``_broadcast`` delivered them locally already) and
+    counts a ``seq`` jump from another instance as a gap.
+    """
+
+    def __init__(self, redis_url: str, channel: str = "match-detail-updates", instance_id: Optional[str] = None):
+        self._redis = Redis.from_url(redis_url, decode_responses=True, socket_connect_timeout=_REDIS_TIMEOUT,
+                                     socket_timeout=_REDIS_TIMEOUT)
         self._channel = channel
+        self._pubsub = None
+        # matches with clients here / matches whose channel is subscribed
+        self._wanted: Set[str] = set()
+        self._watched: Set[str] = set()
+        # the listener has something to do: a match to subscribe to, or a connection to renew
+        self._wakeup = asyncio.Event()
+        self._stale = False
+        self.instance_id = instance_id or uuid.uuid4().hex
+        self._seq: Dict[str, int] = {}
+        # (origin, match id) -> last seq received
+        self._last_seq: Dict[Tuple[str, str], int] = {}
+        self.published = 0
+        self.received = 0
+        self.echoes = 0
+        self.gaps = 0
+        self.invalid = 0
+        self.subscribe_errors = 0
+        self.reconnects = 0
         self._task: asyncio.Task | None = None
         self._manager: ChannelManager | None = None
+        self._on_message: Optional[Callable[[dict], None]] = None
+        self._on_follow: Optional[Callable[[str, bool], None]] = None
 
-    async def start(self, manager: ChannelManager):
+    async def start(self, manager: ChannelManager, on_message: Optional[Callable[[dict], None]] = None,
+                    on_follow: Optional[Callable[[str, bool], None]] = None):
         self._manager = manager
+        self._on_message = on_message
+        self._on_follow = on_follow
+        # subscribes to what is wanted by then
         self._task = asyncio.create_task(self._listen())
 
     async def stop(self):
         if self._task:
             self._task.cancel()
-        await self._redis.close()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._disconnect()
+        await self._redis.aclose()
 
-    async def publish(self, message: dict):
-        await self._redis.publish(self._channel, json.dumps(message))
+    def _channel_of(self, match_id: str) -> str:
+        return f"{self._channel}:{match_id}"
 
-    async def _listen(self):
+    def _follow(self, match_id: str, following: bool):
+        if following:
+            self._watched.add(match_id)
+        else:
+            self._watched.discard(match_id)
+        if self._on_follow:
+            self._on_follow(match_id, following)
+
+    async def set_interest(self, match_id: str, watching: bool):
+        """Subscribe to (or leave) the match's channel."""
+        if watching == (match_id in self._wanted):
+            return
+        if watching:
+            self._wanted.add(match_id)
+        else:
+            self._wanted.discard(match_id)
+            if match_id in self._watched:
+                self._follow(match_id, False)
+        pubsub = self._pubsub
+        if pubsub is None:
+            self._wakeup.set()  # the listener subscribes once connected
+            return
+        try:
+            if watching:
+                await pubsub.subscribe(self._channel_of(match_id))
+                # the client may have left meanwhile, or the connection been replaced
+                if match_id in self._wanted and pubsub is self._pubsub:
+                    self._follow(match_id, True)
+                    self._wakeup.set()
+            else:
+                await pubsub.unsubscribe(self._channel_of(match_id))
+        except (Exception, asyncio.CancelledError) as e:
+            # the client is served anyway; the listener renews the connection and subscribes again
+            self.subscribe_errors += 1
+            self._stale = True
+            self._wakeup.set()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+
+    def stamp(self, message: dict) -> dict:
+        """Add ``origin`` and the match's next ``seq``; call before encoding."""
+        match_id = message["matchId"]
+        self._seq[match_id] = self._seq.get(match_id, 0) + 1
+        message["origin"] = self.instance_id
+        message["seq"] = self._seq[match_id]
+        return message
+
+    async def publish(self, message: dict, data: Optional[str] = None):
+        await self._redis.publish(self._channel_of(message["matchId"]), data or encode(message))
+        self.published += 1
+
+    def _track(self, message: dict):
+        key, seq = (message.get("origin"), message.get("matchId")), message.get("seq")
+        if key[0] is None or seq is None:
+            return
+        last = self._last_seq.get(key)
+        if last is not None and seq > last + 1:
+            self.gaps += 1
+        self._last_seq[key] = seq
+
+    async def _connect(self):
         pubsub = self._redis.pubsub()
-        await pubsub.subscribe(self._channel)
-        async for msg in pubsub.listen():
-            if msg["type"] != "message":
-                continue
-            payload = json.loads(msg["data"])
-            if self._manager:
-                await self._manager.broadcast(payload)
+        try:
+            matches = set(self._wanted)
+            await pubsub.subscribe(*(self._channel_of(match_id) for match_id in matches))
+        except BaseException:
+            await pubsub.aclose()
+            raise
+        self._pubsub = pubsub
+        for match_id in matches & self._wanted:
+            self._follow(match_id, True)
+        # left while SUBSCRIBE ran
+        for match_id in matches - self._wanted:
+            await pubsub.unsubscribe(self._channel_of(match_id))
+        # wanted while SUBSCRIBE ran: set_interest saw no connection
+        for match_id in self._wanted - matches:
+            await pubsub.subscribe(self._channel_of(match_id))
+            self._follow(match_id, True)
+
+    async def _disconnect(self):
+        pubsub, self._pubsub = self._pubsub, None
+        self._stale = False
+        # whatever other instances publish from now on is missed: cached snapshots can't be trusted
+        for match_id in list(self._watched):
+            self._follow(match_id, False)
+        if pubsub is not None:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+    async def _listen(self):
+        while True:
+            try:
+                if self._stale:
+                    raise ConnectionError("subscription failed")
+                if self._pubsub is None and self._wanted:
+                    await self._connect()
+                if self._pubsub is None or not self._pubsub.subscribed:
+                    # nothing watched (the unsubscribe replies have been read): wait for a subscribe
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+                # bounded wait: a failed set_interest is noticed within _POLL_SECONDS
+                msg = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=_POLL_SECONDS)
+                if msg is None or msg["type"] != "message":
+                    continue
+                try:
+                    payload = json.loads(msg["data"])
+                except ValueError:
+                    self.invalid += 1
+                    continue
+                await self._receive(payload, msg["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.reconnects += 1
+                await self._disconnect()
+                await asyncio.sleep(_RETRY_SECONDS)
+
+    async def _receive(self, payload: dict, data: str):
+        if payload.get("origin") == self.instance_id:
+            self.echoes += 1
+            return
+        self.received += 1
+        self._track(payload)
+        if self._on_message:
+            self._on_message(payload)
+        if self._manager:
+            # forwarded as received: no second encoding
+            await self._manager.broadcast(payload, data)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "instanceId": self.instance_id,
+            "published": self.published,
+            "received": self.received,
+            "echoesSkipped": self.echoes,
+            "gaps": self.gaps,
+            "subscribedMatches": len(self._watched),
+            "subscribeErrors": self.subscribe_errors,
+            "reconnects": self.reconnects,
+            "invalidMessages": self.invalid,
+        }
@@ -1,12 +1,14 @@
+import asyncio
 from tinydb import Query
 from datetime import datetime
-from typing import Dict, Any
-import json, httpx
-from .database import details_table, events_table, lineups_table, stats_table
-from .config import MATCHES_BASE_URL, TEAMS_BASE_URL, COMPETITIONS_BASE_URL, REQUEST_TIMEOUT
+from typing import Dict, Any, List
+from .database import details_table, events_table, lineups_table, stats_table, db_executor
+from .http_client import http_client
+from .encoding import to_jsonable
+from .config import MATCHES_BASE_URL, TEAMS_BASE_URL, COMPETITIONS_BASE_URL, DETAIL_DEADLINE
 
 class DetailRepository:
-    def _ser(self, d: Dict[str, Any]): return json.loads(json.dumps(d, default=str, ensure_ascii=False))
+    def _ser(self, d: Dict[str, Any]): return to_jsonable(d)
     def upsert_meta(self, doc: Dict[str, Any]):
         q = Query()
         if details_table.search(q.id == doc["id"]): details_table.update(self._ser(doc), q.id == doc["id"])
@@ -17,37 +19,84 @@ class DetailRepository:
     def add_event(self, mid: str, ev: Dict[str, Any]):
         evd = dict(ev, matchId=mid, id=ev.get("id") or f"EVT_{int(datetime.utcnow().timestamp()*1000)}")
         events_table.insert(self._ser(evd)); return evd
+    def add_event_once(self, mid: str, ev: Dict[str, Any]):
+        q = Query()
+        if events_table.search((q.matchId == mid) & (q.id == ev["id"])): return None
+        return self.add_event(mid, ev)
+    def add_events(self, mid: str, evs: List[Dict[str, Any]]):
+        stamp = int(datetime.utcnow().timestamp()*1000)
+        evds = [dict(ev, matchId=mid, id=ev.get("id") or f"EVT_{stamp}_{i}") for i, ev in enumerate(evs)]
+        events_table.insert_multiple([self._ser(evd) for evd in evds]); return evds
+    def add_events_once(self, evs: List[Dict[str, Any]]):
+        """Stores, in one write, the events (each with its matchId) not stored yet; returns those."""
+        q = Query(); seen, new = set(), []
+        for mid in {ev["matchId"] for ev in evs}: seen.update((mid, e["id"]) for e in events_table.search(q.matchId == mid))
+        for ev in evs:
+            if (ev["matchId"], ev["id"]) not in seen: seen.add((ev["matchId"], ev["id"])); new.append(ev)
+        if new: events_table.insert_multiple([self._ser(ev) for ev in new])
+        return new
     def list_events(self, mid: str): return sorted(events_table.search(Query().matchId == mid), key=lambda e:e.get("minute",0))
     def get_lineups(self, mid: str):
         r = lineups_table.search(Query().matchId == mid); return r[0] if r else {"home":[],"away":[]}
     def get_stats(self, mid: str):
         r = stats_table.search(Query().matchId == mid); return r[0] if r else {"home":{"score":0},"away":{"score":0},"players":[]}
-    def set_lineups(self, mid: str, lineups: Dict[str, Any]):
-        q = Query()
-        payload = dict(lineups, matchId=mid)
-        if lineups_table.search(q.matchId == mid): lineups_table.update(self._ser(payload), q.matchId == mid)
-        else: lineups_table.insert(self._ser(payload))
-        return self.get_lineups(mid)
-    def set_stats(self, mid: str, stats: Dict[str, Any]):
+    def _replace(self, table, current, mid: str, doc: Dict[str, Any]):
+        """Store ``doc`` as the match's lineups/stats with the next version; returns (previous, saved)."""
         q = Query()
-        payload = dict(stats, matchId=mid)
-        if stats_table.search(q.matchId == mid): stats_table.update(self._ser(payload), q.matchId == mid)
-        else: stats_table.insert(self._ser(payload))
-        return self.get_stats(mid)
-    async def _safe(self, url):
+        previous = current(mid)
+        payload = self._ser(dict(doc, matchId=mid, version=(previous.get("version") or 0) + 1))
+        if table.search(q.matchId == mid): table.update(payload, q.matchId == mid)
+        else: table.insert(payload)
+        return previous, payload
+    def set_lineups(self, mid: str, lineups: Dict[str, Any]): return self._replace(lineups_table, self.get_lineups, mid, lineups)
+    def set_stats(self, mid: str, stats: Dict[str, Any]): return self._replace(stats_table, self.get_stats, mid, stats)
+    async def _safe(self, dependency, url, body=None):
         try:
-            async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT) as c:
-                r = await c.get(url)
-                if r.status_code==200: return r.json()
-        except: return None
+            r = await (http_client.post(dependency, url, json=body) if body is not None else http_client.get(dependency, url))
+            if r.status_code==200: return r.json()
+        except Exception: return None
+    def _references(self, meta):
+        """(dependency, url, body) of each remote lookup the match meta needs; both teams go in one batchGet."""
+        refs = {}
+        team_ids = [tid for tid in dict.fromkeys([meta.get("homeTeamId"), meta.get("awayTeamId")]) if tid]
+        if TEAMS_BASE_URL and team_ids: refs["teams"] = ("teams", f"{TEAMS_BASE_URL}/api/v1/teams:batchGet", {"ids": team_ids})
+        if COMPETITIONS_BASE_URL and meta.get("competitionId"): refs["competition"] = ("competitions", f"{COMPETITIONS_BASE_URL}/api/v1/competitions/{meta['competitionId']}", None)
+        return refs
     async def get_detail(self, mid: str):
-        meta = self.get_meta(mid) or {"id":mid,"status":"SCHEDULED"}
-        if MATCHES_BASE_URL: meta = await self._safe(f"{MATCHES_BASE_URL}/api/v1/matches/{mid}") or meta
-        home = await self._safe(f"{TEAMS_BASE_URL}/api/v1/teams/{meta.get('homeTeamId')}") if TEAMS_BASE_URL and meta.get("homeTeamId") else None
-        away = await self._safe(f"{TEAMS_BASE_URL}/api/v1/teams/{meta.get('awayTeamId')}") if TEAMS_BASE_URL and meta.get("awayTeamId") else None
-        comp = await self._safe(f"{COMPETITIONS_BASE_URL}/api/v1/competitions/{meta.get('competitionId')}") if COMPETITIONS_BASE_URL and meta.get("competitionId") else None
-        return {"match":meta,"homeTeam":home,"awayTeam":away,"competition":comp,
-                "events":self.list_events(mid),"lineups":self.get_lineups(mid),"stats":self.get_stats(mid)}
+        """Aggregate the match with its teams, competition and local data.
+
+        Lookups run concurrently: teams and competition start from the stored
+        meta right away and are redone only if the matches service points
+        elsewhere. Whatever has not answered by DETAIL_DEADLINE comes back as
+        null instead of holding up the response.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + DETAIL_DEADLINE
+        local = asyncio.gather(db_executor.read(self.list_events, mid), db_executor.read(self.get_lineups, mid), db_executor.read(self.get_stats, mid))
+        pending = {}
+        def start(refs):
+            for key in set(pending) - set(refs): pending.pop(key)[1].cancel()
+            for key, (dependency, url, body) in refs.items():
+                if key in pending and pending[key][0] == (url, body): continue
+                if key in pending: pending[key][1].cancel()
+                pending[key] = ((url, body), asyncio.ensure_future(self._safe(dependency, url, body)))
+        try:
+            meta = await db_executor.read(self.get_meta, mid) or {"id":mid,"status":"SCHEDULED"}
+            start(self._references(meta))
+            if MATCHES_BASE_URL:
+                remote = asyncio.ensure_future(self._safe("matches", f"{MATCHES_BASE_URL}/api/v1/matches/{mid}"))
+                await asyncio.wait([remote], timeout=max(0.0, deadline - loop.time()))
+                if remote.done() and remote.result(): meta = remote.result()
+                else: remote.cancel()
+                start(self._references(meta))
+            if pending: await asyncio.wait([task for _, task in pending.values()], timeout=max(0.0, deadline - loop.time()))
+            found = {key: task.result() if task.done() else None for key, (_, task) in pending.items()}
+            events, lineups, stats = await local
+        finally:
+            for _, task in pending.values(): task.cancel()
+        teams = {team.get("id"): team for team in (found.get("teams") or {}).get("data", [])}
+        return {"match":meta,"homeTeam":teams.get(meta.get("homeTeamId")),"awayTeam":teams.get(meta.get("awayTeamId")),"competition":found.get("competition"),
+                "events":events,"lineups":lineups,"stats":stats}
 
 
 # Compatibility repository expected by routes.py
@@ -1,24 +1,79 @@
+import asyncio
 import json
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.exceptions import RequestValidationError
 from fastapi.responses import StreamingResponse
-from typing import Dict
+from pydantic import Field, TypeAdapter, ValidationError
+from typing import Annotated, Dict, List, Optional, Tuple
 
-from .config import settings
+from .config import settings, SNAPSHOT_MAX_MATCHES, SNAPSHOT_TTL, SNAPSHOT_UNFOLLOWED_TTL
+from .database import db_executor
 from .repository import MatchDetailRepository
-from .models import MatchDetailOut, MatchMeta, Event, Lineups, Stats
+from .models import MatchDetailOut, MatchMeta, Event, EventNotice, LiveCommand, Lineups, Stats
 from .auth import require_auth
-from .realtime import ChannelManager, RedisBroadcaster, WSClient, SSEClient
+from .realtime import ChannelManager, RedisBroadcaster, ReplayBuffer, WSClient, SSEClient, encode, sse_frame
+from .snapshots import SnapshotStore, diff
 
 router = APIRouter()
 repo = MatchDetailRepository()
-manager = ChannelManager()
-broadcaster = RedisBroadcaster(settings.redis_url)
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl")
+_event_batch = TypeAdapter(Annotated[List[Event], Field(min_length=1, max_length=settings.events_batch_limit)])
+broadcaster = RedisBroadcaster(settings.redis_url, instance_id=settings.instance_id)
+snapshots = SnapshotStore(repo.get_detail, max_matches=SNAPSHOT_MAX_MATCHES, ttl=SNAPSHOT_TTL,
+                          unfollowed_ttl=SNAPSHOT_UNFOLLOWED_TTL)
+
+
+# match id -> ((snapshot version, last message id), encoded snapshot message)
+_encoded_snapshots: Dict[str, Tuple[Tuple[int, Optional[str]], str]] = {}
+
+
+def _encode_snapshot(match_id: str, snapshot: Dict, last_id: Optional[str]) -> str:
+    """Snapshot message text, encoded once per snapshot version however many clients get it.
+
+    ``lastId`` is the newest message the client may count as seen: it can
+    reconnect with it and get only what came after.
+    """
+    key = (snapshot["version"], last_id)
+    cached = _encoded_snapshots.pop(match_id, None)
+    if cached is None or cached[0] != key:
+        cached = (key, encode({"type": "snapshot", "matchId": match_id, "lastId": last_id, "payload": snapshot}))
+    _encoded_snapshots[match_id] = cached
+    if len(_encoded_snapshots) > SNAPSHOT_MAX_MATCHES:
+        del _encoded_snapshots[next(iter(_encoded_snapshots))]
+    return cached[1]
+
+
+def _snapshot_message(match_id: str):
+    snapshot = snapshots.peek(match_id)
+    if snapshot is None:
+        return None
+    return _encode_snapshot(match_id, snapshot, manager.replay.last_id(match_id))
+
+
+# first client of a match here / last one gone: follow its Redis channel or leave it; the
+# snapshot counts as followed (snapshots.follow, wired in main) once the subscription is live
+manager = ChannelManager(settings.ws_send_queue, settings.ws_slow_client_policy, snapshot=_snapshot_message,
+                         sse_queue_size=settings.sse_send_queue,
+                         replay=ReplayBuffer(settings.replay_buffer_size, max_matches=SNAPSHOT_MAX_MATCHES),
+                         on_interest=broadcaster.set_interest)
 
 
 async def _broadcast(message: Dict):
-    message.setdefault("matchId", message.get("payload", {}).get("matchId"))
-    await manager.broadcast(message)
-    await broadcaster.publish(message)
+    if "matchId" not in message:
+        message["matchId"] = message.get("payload", {}).get("matchId")
+    broadcaster.stamp(message)
+    snapshots.apply(message)
+    data = encode(message)
+    await manager.broadcast(message, data)
+    await broadcaster.publish(message, data)
+
+
+def _state_message(section: str, match_id: str, previous: Dict, saved: Dict) -> Dict:
+    """``<section>.updated`` with the whole document, or only what changed with REALTIME_DELTAS."""
+    if settings.realtime_deltas:
+        return {"type": f"{section}.delta", "matchId": match_id, "payload": diff(previous, saved)}
+    return {"type": f"{section}.updated", "matchId": match_id, "payload": saved}
 
 
 @router.get("/", summary="Service info")
@@ -31,12 +86,12 @@ async def root():
 
 @router.get("/api/v1/match-details/{match_id}", response_model=MatchDetailOut, summary="Get Match Details")
 async def get_match_details_v2(match_id: str):
-    return await repo.get_detail(match_id)
+    return await snapshots.get(match_id)
 
 # Backward compatibility route
 @router.get("/api/v1/matches/{match_id}/details", response_model=MatchDetailOut)
 async def get_match_details_legacy(match_id: str):
-    return await repo.get_detail(match_id)
+    return await snapshots.get(match_id)
 
 
 # --- Write endpoints (optional, used by control panels or admins) ---
@@ -46,7 +101,7 @@ async def get_match_details_legacy(match_id: str):
     dependencies=[Depends(require_auth)],
 )
 async def upsert_meta(match_id: str, meta: MatchMeta):
-    repo.upsert_meta(meta.model_dump())
+    await db_executor.write(repo.upsert_meta, meta.model_dump())
     payload = meta.model_dump()
     payload["matchId"] = match_id
     await _broadcast({"type": "match.updated", "matchId": match_id, "payload": payload})
@@ -59,18 +114,46 @@ async def upsert_meta(match_id: str, meta: MatchMeta):
     dependencies=[Depends(require_auth)],
 )
 async def create_event(match_id: str, ev: Event):
-    created = repo.add_event(match_id, ev.model_dump())
+    created = await db_executor.write(repo.add_event, match_id, ev.model_dump())
     await _broadcast({"type": "event.created", "matchId": match_id, "payload": created})
     return created
 
+async def _read_batch(request: Request) -> List[Event]:
+    """Body as a JSON array or, for NDJSON content types, one event per line."""
+    body = await request.body()
+    try:
+        if request.headers.get("content-type", "").split(";")[0].strip() in NDJSON_TYPES:
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    try:
+        return _event_batch.validate_python(items)
+    except ValidationError as e:
+        raise RequestValidationError([dict(err, loc=("body", *err["loc"])) for err in e.errors()])
+
+@router.post(
+    "/api/v1/match-details/{match_id}/events:batch",
+    status_code=201,
+    response_model=List[Event],
+    dependencies=[Depends(require_auth)],
+)
+async def create_events(match_id: str, request: Request):
+    # all or nothing: one write once every event is valid, one events.created for the lot
+    events = await _read_batch(request)
+    created = await db_executor.write(repo.add_events, match_id, [ev.model_dump() for ev in events])
+    await _broadcast({"type": "events.created", "matchId": match_id, "payload": created})
+    return created
+
 @router.put(
     "/api/v1/match-details/{match_id}/lineups",
     response_model=Lineups,
     dependencies=[Depends(require_auth)],
 )
 async def put_lineups(match_id: str, lineups: Lineups):
-    saved = repo.set_lineups(match_id, lineups.model_dump())
-    await _broadcast({"type": "lineups.updated", "matchId": match_id, "payload": saved})
+    previous, saved = await db_executor.write(repo.set_lineups, match_id, lineups.model_dump())
+    await _broadcast(_state_message("lineups", match_id, previous, saved))
     return saved
 
 @router.put(
@@ -79,20 +162,53 @@ async def put_lineups(match_id: str, lineups: Lineups):
     dependencies=[Depends(require_auth)],
 )
 async def put_stats(match_id: str, stats: Stats):
-    saved = repo.set_stats(match_id, stats.model_dump())
-    await _broadcast({"type": "stats.updated", "matchId": match_id, "payload": saved})
+    previous, saved = await db_executor.write(repo.set_stats, match_id, stats.model_dump())
+    await _broadcast(_state_message("stats", match_id, previous, saved))
     return saved
 
 
+# --- Notifications from eventsService (BROADCAST_PATH there) ---
+@router.post(
+    "/broadcast/event.created",
+    status_code=202,
+    response_model=Event,
+    dependencies=[Depends(require_auth)],
+)
+async def event_from_events_service(notice: EventNotice):
+    created = await db_executor.write(repo.add_event_once, notice.matchId, notice.to_event().model_dump())
+    # None: stored (and broadcast) already, eventsService is retrying
+    if created:
+        await _broadcast({"type": "event.created", "matchId": notice.matchId, "payload": created})
+    return created or notice.to_event()
+
+@router.post(
+    "/broadcast/events.created",
+    status_code=202,
+    response_model=List[Event],
+    dependencies=[Depends(require_auth)],
+)
+async def events_from_events_service(notices: List[EventNotice]):
+    events = [dict(notice.to_event().model_dump(), matchId=notice.matchId) for notice in notices]
+    created = await db_executor.write(repo.add_events_once, events)
+    by_match: Dict[str, List[Dict]] = {}
+    for event in created:
+        by_match.setdefault(event["matchId"], []).append(event)
+    for match_id, payload in by_match.items():
+        await _broadcast({"type": "events.created", "matchId": match_id, "payload": payload})
+    return [notice.to_event() for notice in notices]
+
+
 # --- WebSocket for live updates ---
 @router.websocket("/ws/matches/{match_id}")
-async def ws_match_updates(websocket: WebSocket, match_id: str):
+async def ws_match_updates(websocket: WebSocket, match_id: str, since: Optional[str] = None):
+    # since: id ("origin:seq") of the last message received before reconnecting
     await websocket.accept()
     client = WSClient(websocket=websocket, match_id=match_id)
-    await manager.register_ws(client)
-    snapshot = await repo.get_detail(match_id)
-    await websocket.send_text(json.dumps({"type": "snapshot", "matchId": match_id, "payload": snapshot}))
+    resumed, last_id = await manager.register_ws(client, since)
     try:
+        if not resumed:
+            snapshot = await snapshots.get(match_id)
+            manager.send_snapshot(client, _encode_snapshot(match_id, snapshot, last_id))
         while True:
             await websocket.receive_text()
     except WebSocketDisconnect:
@@ -101,18 +217,69 @@ async def ws_match_updates(websocket: WebSocket, match_id: str):
         await manager.unregister_ws(client)
 
 
+async def _live_command(client: WSClient, text: str):
+    try:
+        command = LiveCommand.model_validate_json(text)
+    except ValidationError as e:
+        manager.send(client, encode({"type": "error", "detail": e.errors(include_url=False, include_context=False)}))
+        return
+    match_ids = list(dict.fromkeys(command.matchIds))
+    if command.action == "unsubscribe":
+        for match_id in match_ids:
+            await manager.unsubscribe(client, match_id)
+        return
+    new = [match_id for match_id in match_ids if match_id not in client.matches]
+    if len(client.matches) + len(new) > settings.ws_live_max_matches:
+        manager.send(client, encode({"type": "error", "detail": f"at most {settings.ws_live_max_matches} matches per connection"}))
+        return
+    cursors = {}
+    for match_id in new:
+        resumed, last_id = await manager.subscribe(client, match_id, command.since.get(match_id))
+        if not resumed:
+            cursors[match_id] = last_id
+    # snapshots of all the new matches are fetched together
+    built = await asyncio.gather(*(snapshots.get(match_id) for match_id in cursors))
+    for (match_id, last_id), snapshot in zip(cursors.items(), built):
+        if match_id in client.matches:
+            manager.send_snapshot(client, _encode_snapshot(match_id, snapshot, last_id))
+
+
+@router.websocket("/ws/live")
+async def ws_live_updates(websocket: WebSocket):
+    """One connection for many matches, driven by LiveCommand messages.
+
+    ``{"action": "subscribe", "matchIds": [...]}`` sends a snapshot of each
+    new match (or the missed messages, given ``since``) and then its updates;
+    every message names its ``matchId``.
+    """
+    await websocket.accept()
+    client = WSClient(websocket=websocket)
+    await manager.register_ws(client)
+    try:
+        while True:
+            await _live_command(client, await websocket.receive_text())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await manager.unregister_ws(client)
+
+
 @router.get("/sse/matches/{match_id}")
-async def sse_match_updates(match_id: str):
+async def sse_match_updates(match_id: str, last_event_id: Optional[str] = Header(None)):
     client = SSEClient(match_id)
 
     async def event_stream():
-        await manager.register_sse(client)
-        snapshot = await repo.get_detail(match_id)
-        yield f"data: {json.dumps({'type': 'snapshot', 'matchId': match_id, 'payload': snapshot})}\n\n"
+        resumed, last_id = await manager.register_sse(client, last_event_id)
         try:
+            if not resumed:
+                snapshot = await snapshots.get(match_id)
+                # an empty id clears whatever the browser had: it is not resumable here
+                yield sse_frame(_encode_snapshot(match_id, snapshot, last_id), last_id or "")
             while True:
-                data = await client.queue.get()
-                yield f"data: {data}\n\n"
+                frame = await client.get()
+                if frame is None:  # fell too far behind; the browser reconnects
+                    break
+                yield frame
         finally:
             await manager.unregister_sse(client)
 
@@ -0,0 +1,256 @@
+"""Materialized match details, patched in place by the realtime messages.
+
+Building a ``MatchDetailOut`` costs up to three remote calls plus three table
+scans (``DetailRepository.get_detail``). ``SnapshotStore`` keeps the result
+per match and serves GETs and new WebSocket/SSE subscribers from it. Every
+message that is broadcast (local writes, eventsService notifications and
+messages from other instances via Redis) goes through ``apply``, which
+replaces the snapshot with a patched copy, so a snapshot handed out earlier
+never changes under its holder.
+
+``version`` comes from one counter for the whole process and grows with every
+build and every patch that changed something: a higher version is a fresher
+snapshot. Snapshots are rebuilt after ``ttl`` seconds (teams, competition and
+the match itself live in other services) and at most ``max_matches`` are kept,
+least recently read first out. A build missing a team or the competition
+(deadline hit, service down) is returned but not kept, and neither is a build
+that a write overtook while it ran.
+
+Lineups and stats carry their own ``version``, stored with them and bumped by
+one on every write. ``stats.delta``/``lineups.delta`` messages (``diff`` of
+two versions) apply only on top of the version right before theirs; an older
+one is already in, a newer one means one was missed, and the snapshot is
+dropped to be rebuilt.
+
+Updates made on other instances arrive only for matches this instance
+follows (has live clients for, see ``follow``). A snapshot of any other match
+is kept for ``unfollowed_ttl`` seconds only, and following or unfollowing a
+match drops its snapshot: it may have missed updates in between.
+
+Concurrent reads of a match without a usable snapshot share one build (a
+kick-off brings thousands of subscribers at once): the first starts it as a
+task, the rest await that task. A subscriber that goes away while waiting
+does not cancel the build for the others.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from .encoding import to_jsonable
+
+_REFERENCES = {"homeTeamId": "homeTeam", "awayTeamId": "awayTeam", "competitionId": "competition"}
+_DELTAS = {"lineups.delta": "lineups", "stats.delta": "stats"}
+
+
+def _by_player(items: Any) -> Optional[Dict[str, Dict[str, Any]]]:
+    if isinstance(items, list) and all(isinstance(item, dict) and "playerId" in item for item in items):
+        return {item["playerId"]: item for item in items}
+    return None
+
+
+def _diff_players(old: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """``{"upsert": [...], "remove": [...]}`` for a per-player list, None if it has to go whole."""
+    before, after = _by_player(old), _by_player(new)
+    if before is None or after is None or len(before) != len(old) or len(after) != len(new):
+        return None
+    kept = [pid for pid in before if pid in after]
+    if list(after)[:len(kept)] != kept:
+        return None  # reordered: merge() could not rebuild the order
+    changes: Dict[str, Any] = {}
+    upsert = [dict(diff(before[pid], item), playerId=pid) if pid in before else item
+              for pid, item in after.items() if before.get(pid) != item]
+    if upsert:
+        changes["upsert"] = upsert
+    if len(kept) != len(before):
+        changes["remove"] = [pid for pid in before if pid not in after]
+    return changes
+
+
+def diff(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields of ``new`` that differ from ``old``, for ``merge``.
+
+    Nested objects go field by field and per-player lists (stats players,
+    lineups) player by player; other lists go whole. Removed keys come as None.
+    """
+    changes = {}
+    for key in old.keys() | new.keys():
+        before, after = old.get(key), new.get(key)
+        if before == after:
+            continue
+        if isinstance(before, dict) and isinstance(after, dict):
+            changes[key] = diff(before, after)
+        elif isinstance(before, list) and isinstance(after, list):
+            players = _diff_players(before, after)
+            changes[key] = after if players is None else players
+        else:
+            changes[key] = after
+    return changes
+
+
+def merge(base: Dict[str, Any], changes: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of ``base`` with a ``diff`` applied."""
+    merged = dict(base)
+    for key, value in changes.items():
+        current = merged.get(key)
+        if isinstance(value, dict) and isinstance(current, dict):
+            merged[key] = merge(current, value)
+        elif isinstance(value, dict) and isinstance(current, list):
+            players = dict(_by_player(current) or {})
+            for pid in value.get("remove", ()):
+                players.pop(pid, None)
+            for item in value.get("upsert", ()):
+                players[item["playerId"]] = merge(players.get(item["playerId"], {}), item)
+            merged[key] = list(players.values())
+        else:
+            merged[key] = value
+    return merged
+
+
+class SnapshotStore:
+    def __init__(self, build: Callable[[str], Awaitable[Dict[str, Any]]], max_matches: int = 1000, ttl: float = 300.0,
+                 unfollowed_ttl: Optional[float] = None):
+        self._build = build
+        self.max_matches = max_matches
+        self.ttl = ttl
+        self.unfollowed_ttl = ttl if unfollowed_ttl is None else unfollowed_ttl
+        self._followed: Set[str] = set()
+        self._snapshots: OrderedDict[str, tuple] = OrderedDict()
+        # match id -> [builds running, messages applied meanwhile]
+        self._building: Dict[str, List[int]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._clock = itertools.count(1)
+        self.hits = 0
+        self.builds = 0
+        self.coalesced = 0
+        self.patches = 0
+
+    def peek(self, match_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._snapshots.get(match_id)
+        return entry[1] if entry else None
+
+    async def get(self, match_id: str) -> Dict[str, Any]:
+        entry = self._snapshots.get(match_id)
+        if entry and entry[0] > time.monotonic():
+            self._snapshots.move_to_end(match_id)
+            self.hits += 1
+            return entry[1]
+        task = self._inflight.get(match_id)
+        if task is None:
+            task = self._inflight[match_id] = asyncio.ensure_future(self._rebuild(match_id))
+            task.add_done_callback(lambda done: self._build_done(match_id, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _build_done(self, match_id: str, task: asyncio.Task):
+        if self._inflight.get(match_id) is task:
+            del self._inflight[match_id]
+        if not task.cancelled():
+            task.exception()  # raised to the waiters; don't warn if none is left
+
+    async def _rebuild(self, match_id: str) -> Dict[str, Any]:
+        state = self._building.setdefault(match_id, [0, 0])
+        state[0] += 1
+        seen = state[1]
+        try:
+            detail = await self._build(match_id)
+        finally:
+            state[0] -= 1
+            if not state[0]:
+                self._building.pop(match_id, None)
+        self.builds += 1
+        snapshot = dict(detail, version=next(self._clock))
+        if state[1] == seen and self._complete(snapshot):
+            ttl = self.ttl if match_id in self._followed else self.unfollowed_ttl
+            self._store(match_id, snapshot, time.monotonic() + ttl)
+        return snapshot
+
+    @staticmethod
+    def _complete(snapshot: Dict[str, Any]) -> bool:
+        match = snapshot.get("match") or {}
+        return all(snapshot.get(part) is not None for ref, part in _REFERENCES.items() if match.get(ref))
+
+    def _store(self, match_id: str, snapshot: Dict[str, Any], expires: float):
+        self._snapshots[match_id] = (expires, snapshot)
+        self._snapshots.move_to_end(match_id)
+        while len(self._snapshots) > self.max_matches:
+            self._snapshots.popitem(last=False)
+
+    def follow(self, match_id: str, following: bool):
+        """Record whether updates from other instances reach ``apply`` for the match."""
+        if following:
+            self._followed.add(match_id)
+        else:
+            self._followed.discard(match_id)
+        self.invalidate(match_id)
+
+    def invalidate(self, match_id: str):
+        self._snapshots.pop(match_id, None)
+        # a build already running may use what was just invalidated: it is
+        # returned to its waiters but not kept
+        self._inflight.pop(match_id, None)
+        state = self._building.get(match_id)
+        if state:
+            state[1] += 1
+
+    def apply(self, message: Dict[str, Any]) -> Optional[int]:
+        """Patch the snapshot of ``message["matchId"]``; returns its version (None if not cached)."""
+        match_id = message.get("matchId")
+        state = self._building.get(match_id)
+        if state:
+            state[1] += 1
+        entry = self._snapshots.get(match_id)
+        if entry is None:
+            return None
+        expires, snapshot = entry
+        kind, payload = message.get("type"), message.get("payload") or {}
+        if kind in ("event.created", "events.created"):
+            events = list(snapshot["events"])
+            seen = {ev.get("id") for ev in events}
+            for event in (payload if kind == "events.created" else [payload]):
+                if event.get("id") in seen:
+                    continue
+                seen.add(event.get("id"))
+                # same order as list_events: by minute, arrival order within a minute
+                minute = event.get("minute", 0)
+                at = len(events)
+                while at and events[at - 1].get("minute", 0) > minute:
+                    at -= 1
+                events.insert(at, event)
+            changes = {"events": events}
+        elif kind == "lineups.updated":
+            changes = {"lineups": payload}
+        elif kind == "stats.updated":
+            changes = {"stats": payload}
+        elif kind in _DELTAS:
+            section = _DELTAS[kind]
+            version, current = payload.get("version") or 0, snapshot[section].get("version") or 0
+            if version <= current:
+                return snapshot["version"]
+            if version != current + 1:
+                self.invalidate(match_id)
+                return None
+            changes = {section: merge(snapshot[section], payload)}
+        elif kind == "match.updated":
+            match = dict(snapshot["match"], **to_jsonable({k: v for k, v in payload.items() if k != "matchId"}))
+            if any(match.get(ref) != snapshot["match"].get(ref) for ref in _REFERENCES):
+                # points at other teams/competition: those need fetching again
+                self.invalidate(match_id)
+                return None
+            changes = {"match": match}
+        else:
+            return snapshot["version"]
+        if all(snapshot.get(key) == value for key, value in changes.items()):
+            return snapshot["version"]
+        patched = dict(snapshot, **changes, version=next(self._clock))
+        self._snapshots[match_id] = (expires, patched)
+        self.patches += 1
+        return patched["version"]
+
+    def stats(self) -> Dict[str, int]:
+        return {"matches": len(self._snapshots), "hits": self.hits, "builds": self.builds, "coalesced": self.coalesced,
+                "patches": self.patches}
@@ -0,0 +1,483 @@
+"""TinyDB storage that keeps the parsed JSON document in memory.
+
+TinyDB's default ``JSONStorage`` re-reads and re-parses the whole file on every
+``search``/``get``/``all``. ``CachedJSONStorage`` parses the file once, serves
+reads from memory and writes every change through to disk. If the file is
+modified by someone else (mtime/size/inode changed) the next read reloads it.
+
+Several processes (uvicorn workers) may share one file: writes happen inside
+``CachedJSONStorage.transaction()``, an exclusive lock on ``<path>.lock`` that
+first reloads whatever other processes committed, and reloads take the same
+lock in shared mode so they never see a half-written file.
+
+Reads may come from several threads at once (see executor.py), so the cache
+and TinyDB's per-table query cache (``SharedTable``) are guarded by locks.
+
+``LogStorage`` + ``LogTable`` are an append-only alternative for tables that
+mostly receive inserts (match events), selected with ``DB_STORAGE=log``. The
+log is meant for a single process.
+"""
+import json
+import logging
+import os
+import threading
+from collections.abc import MutableMapping
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from tinydb.storages import JSONStorage, Storage, touch
+from tinydb.table import Table
+from tinydb.utils import LRUCache
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+_EMPTY = object()
+# documents encoded between two writes of a log snapshot
+_SNAPSHOT_CHUNK = 1000
+
+
+class _FileLock:
+    """Inter-process lock on a sidecar file (flock, or msvcrt on Windows)."""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._pid = os.getpid()
+        self._handle = open(path, "a+")
+
+    def acquire(self, shared: bool = False):
+        if self._pid != os.getpid():
+            # forked after opening (e.g. gunicorn --preload): flock is shared
+            # with the parent's file description, so take our own
+            self._pid = os.getpid()
+            self._handle = open(self._path, "a+")
+        if fcntl:
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            self._handle.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._handle.fileno(), msvcrt.LK_LOCK, 1)
+                    return
+                except OSError:
+                    continue
+
+    def release(self):
+        if fcntl:
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+        else:
+            self._handle.seek(0)
+            msvcrt.locking(self._handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def close(self):
+        self._handle.close()
+
+
+class _LockedLRUCache(LRUCache):
+    def __init__(self, capacity=None):
+        super().__init__(capacity)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            return super().get(key, default)
+
+    def set(self, key, value):
+        with self._lock:
+            super().set(key, value)
+
+    def clear(self):
+        with self._lock:
+            super().clear()
+
+
+class SharedTable(Table):
+    """TinyDB table that is safe to share between threads and processes.
+
+    The query cache is locked, and it is dropped (together with the cached next
+    doc_id) whenever the storage reloaded changes made by another process.
+    Inserts and updates run inside the storage transaction, so the
+    read-modify-write TinyDB does is atomic across processes.
+    """
+
+    query_cache_class = _LockedLRUCache
+    _seen_reloads = None
+
+    def _transaction(self):
+        transaction = getattr(self._storage, "transaction", None)
+        return transaction() if transaction else nullcontext()
+
+    def _refresh(self):
+        self._storage.read()
+        reloads = getattr(self._storage, "reloads", 0)
+        if reloads != self._seen_reloads:
+            self._seen_reloads = reloads
+            self.clear_cache()
+            self._next_id = None
+
+    def insert(self, document):
+        with self._transaction():
+            self._refresh()
+            return super().insert(document)
+
+    def insert_multiple(self, documents):
+        with self._transaction():
+            self._refresh()
+            return super().insert_multiple(documents)
+
+    def _update_table(self, updater):
+        with self._transaction():
+            self._refresh()
+            super()._update_table(updater)
+
+    def search(self, cond):
+        self._refresh()
+        return super().search(cond)
+
+
+class CachedJSONStorage(JSONStorage):
+    def __init__(self, path: str, **kwargs):
+        super().__init__(path, **kwargs)
+        self._path = path
+        self._data: Any = _EMPTY
+        self._stamp = None
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self._lock = threading.RLock()
+        self._file_lock = _FileLock(path + ".lock")
+        self._tx_depth = 0
+        self.read()
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self._path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    @contextmanager
+    def transaction(self):
+        """Hold the exclusive file lock; re-entrant within the owning thread."""
+        with self._lock:
+            if not self._tx_depth:
+                self._file_lock.acquire()
+            self._tx_depth += 1
+            try:
+                yield self
+            finally:
+                self._tx_depth -= 1
+                if not self._tx_depth:
+                    self._file_lock.release()
+
+    def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        with self._lock:
+            stamp = self._file_stamp()
+            if self._data is not _EMPTY and stamp == self._stamp:
+                self.hits += 1
+                return self._data
+            if self._data is not _EMPTY:
+                self.reloads += 1
+            self.misses += 1
+            if not self._tx_depth:
+                self._file_lock.acquire(shared=True)
+            try:
+                self._stamp = self._file_stamp()
+                self._data = super().read()
+            finally:
+                if not self._tx_depth:
+                    self._file_lock.release()
+            return self._data
+
+    def write(self, data: Dict[str, Dict[str, Any]]):
+        with self.transaction():
+            super().write(data)
+            self._data = data
+            self._stamp = self._file_stamp()
+
+    def close(self):
+        super().close()
+        self._file_lock.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "reloads": self.reloads}
+
+
+class _DocView(MutableMapping):
+    """A stored document as TinyDB updaters see it; assigning or deleting a key marks it changed."""
+
+    __slots__ = ("_tracker", "_key", "_doc", "_copied")
+
+    def __init__(self, tracker: "_ChangeTracker", key: str, doc: Dict[str, Any]):
+        self._tracker = tracker
+        self._key = key
+        self._doc = doc
+        self._copied = False
+
+    def _writable(self) -> Dict[str, Any]:
+        # copy on first write: a stored document is never changed in place, so
+        # LogStorage.compact can serialize a shallow copy of the tables
+        if not self._copied:
+            self._doc = dict(self._doc)
+            self._tracker._raw[self._key] = self._doc
+            self._copied = True
+        self._tracker._dirty.add(self._key)
+        return self._doc
+
+    def __getitem__(self, field):
+        return self._doc[field]
+
+    def __setitem__(self, field, value):
+        self._writable()[field] = value
+
+    def __delitem__(self, field):
+        del self._writable()[field]
+
+    def __contains__(self, field):
+        return field in self._doc
+
+    def __iter__(self) -> Iterator:
+        return iter(self._doc)
+
+    def __len__(self):
+        return len(self._doc)
+
+    def __eq__(self, other):
+        return self._doc == (other._doc if isinstance(other, _DocView) else other)
+
+
+class _ChangeTracker(MutableMapping):
+    """Dict view handed to TinyDB updaters that records which docs changed.
+
+    Keys are converted between TinyDB's int doc_ids and the str keys of the
+    raw table. Documents are handed out as ``_DocView``s, so in-place updates
+    (``table[doc_id].update(...)``, update transforms) mark just the documents
+    they assign to; the rest of the table is only read. Changes must go
+    through the document's own keys: mutating a nested dict in place is not
+    seen.
+    """
+
+    def __init__(self, raw: Dict[str, Any], id_class):
+        self._raw = raw
+        self._id_class = id_class
+        self._dirty: Set[str] = set()
+
+    def __getitem__(self, key):
+        k = str(key)
+        return _DocView(self, k, self._raw[k])
+
+    def __setitem__(self, key, doc):
+        k = str(key)
+        self._raw[k] = doc._doc if isinstance(doc, _DocView) else doc
+        self._dirty.add(k)
+
+    def __delitem__(self, key):
+        k = str(key)
+        del self._raw[k]
+        self._dirty.add(k)
+
+    def __contains__(self, key):
+        return str(key) in self._raw
+
+    def __iter__(self) -> Iterator:
+        # over a snapshot of the keys (callers may delete while iterating), converted lazily
+        return map(self._id_class, list(self._raw))
+
+    def __len__(self):
+        return len(self._raw)
+
+    def popitem(self):
+        k, doc = self._raw.popitem()
+        self._dirty.add(k)
+        return self._id_class(k), doc
+
+    def clear(self):
+        # truncate(): MutableMapping.clear would popitem() through a fresh iterator each time
+        self._dirty.update(self._raw)
+        self._raw.clear()
+
+    def changes(self) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+        """``(doc_id, doc)`` pairs; ``doc`` is None for removed documents."""
+        return [(k, self._raw.get(k)) for k in self._dirty]
+
+
+class LogTable(SharedTable):
+    """Table that passes only the changed documents to ``LogStorage.append``."""
+
+    def _update_table(self, updater):
+        if not hasattr(self._storage, "append"):
+            return super()._update_table(updater)
+        # under the storage lock: compaction serializes the same dicts
+        with self._storage.transaction():
+            tables = self._storage.read()
+            view = _ChangeTracker(tables.setdefault(self.name, {}), self.document_id_class)
+            updater(view)
+            self._storage.append(self.name, view.changes())
+        self.clear_cache()
+
+
+class LogStorage(Storage):
+    """Append-only TinyDB storage for write-heavy tables.
+
+    Every mutation is appended to the file as one JSON line
+    (``{"op": "put"|"del", "table", "id", "doc"}``), so an insert costs the size
+    of the document rather than a rewrite of the whole database. A line
+    without ``op`` is a full snapshot in plain TinyDB JSON format, which means an
+    existing ``data/*.json`` file can be opened as a log as-is.
+
+    The state is rebuilt by replaying the file on open and then served from
+    memory. Once more than ``compact_threshold`` records (and more records
+    than live documents) have been appended since the last snapshot, a
+    background thread rewrites the file as a single snapshot. Use it together
+    with :class:`LogTable`.
+    """
+
+    def __init__(self, path: str, compact_threshold: int = 10000, create_dirs: bool = False,
+                 encoding: str = "utf-8", **kwargs):
+        super().__init__()
+        touch(path, create_dirs=create_dirs)
+        self._path = path
+        self._encoding = encoding
+        self.compact_threshold = compact_threshold
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+        self._records = 0
+        self._data: Dict[str, Dict[str, Any]] = self._replay()
+        self._handle = open(path, "ab")
+        self.hits = 0
+        self.misses = 1
+        self.reloads = 0
+        self.appends = 0
+        self.compactions = 0
+
+    def _replay(self) -> Dict[str, Dict[str, Any]]:
+        data: Dict[str, Dict[str, Any]] = {}
+        good = 0
+        with open(self._path, "rb") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    if line.strip():
+                        # torn write at the end of the file: drop it
+                        logger.warning("Discarding unreadable record at offset %s of %s", good, self._path)
+                        break
+                    good += len(line)
+                    continue
+                good += len(line)
+                if "op" not in rec:
+                    data = rec
+                    self._records = 0
+                    continue
+                table = data.setdefault(rec["table"], {})
+                if rec["op"] == "put":
+                    table[rec["id"]] = rec["doc"]
+                else:
+                    table.pop(rec["id"], None)
+                self._records += 1
+        if good != os.path.getsize(self._path):
+            with open(self._path, "rb+") as f:
+                f.truncate(good)
+        return data
+
+    @contextmanager
+    def transaction(self):
+        """Exclude compaction (and other writers) while documents are changed in place."""
+        with self._lock:
+            yield self
+
+    def read(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            self.hits += 1
+            return self._data
+
+    def write(self, data: Dict[str, Dict[str, Any]]):
+        # whole-database writes (drop_tables, plain Table) become a snapshot
+        with self._lock:
+            self._data = data
+        self.compact()
+
+    def append(self, table: str, changes: List[Tuple[str, Optional[Dict[str, Any]]]]):
+        if not changes:
+            return
+        lines = []
+        for doc_id, doc in changes:
+            if doc is None:
+                rec = {"op": "del", "table": table, "id": doc_id}
+            else:
+                rec = {"op": "put", "table": table, "id": doc_id, "doc": doc}
+            lines.append(json.dumps(rec, ensure_ascii=False))
+        with self._lock:
+            self._handle.write(("\n".join(lines) + "\n").encode(self._encoding))
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+            self._records += len(lines)
+            self.appends += len(lines)
+            due = (self._records >= self.compact_threshold
+                   and self._records >= sum(len(t) for t in self._data.values())
+                   and not (self._compactor and self._compactor.is_alive()))
+            if due:
+                self._compactor = threading.Thread(target=self.compact, name="tinydb-log-compactor", daemon=True)
+                self._compactor.start()
+
+    def compact(self):
+        """Rewrite the log as one snapshot line plus whatever was appended meanwhile."""
+        tmp = self._path + ".compact"
+        with self._compact_lock:
+            with self._lock:
+                # documents are replaced, never changed in place (see _DocView): copying the
+                # tables is enough, and writers wait only for that, not for the serialization
+                data = {name: dict(table) for name, table in self._data.items()}
+                self._handle.flush()
+                offset = self._handle.tell()
+            with open(tmp, "wb") as f:
+                self._write_snapshot(f, data)
+                f.flush()
+                os.fsync(f.fileno())
+            with self._lock:
+                self._handle.flush()
+                with open(self._path, "rb") as old:
+                    old.seek(offset)
+                    tail = old.read()
+                with open(tmp, "ab") as f:
+                    f.write(tail)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._handle.close()
+                os.replace(tmp, self._path)
+                self._handle = open(self._path, "ab")
+                self._records = tail.count(b"\n")
+                self.compactions += 1
+
+    def _write_snapshot(self, f, data: Dict[str, Dict[str, Any]]):
+        """``data`` as one JSON line, encoded a document at a time.
+
+        A single ``json.dumps`` of the database holds the GIL for the whole
+        call, which stalls the writer threads as much as holding the lock would.
+        """
+        f.write(b"{")
+        for t, (name, docs) in enumerate(data.items()):
+            chunk = [(", " if t else "") + json.dumps(name) + ": {"]
+            for i, (doc_id, doc) in enumerate(docs.items()):
+                chunk.append((", " if i else "") + json.dumps(doc_id) + ": " + json.dumps(doc, ensure_ascii=False))
+                if len(chunk) >= _SNAPSHOT_CHUNK:
+                    f.write("".join(chunk).encode(self._encoding))
+                    chunk.clear()
+            chunk.append("}")
+            f.write("".join(chunk).encode(self._encoding))
+        f.write(b"}\n")
+
+    def close(self):
+        if self._compactor:
+            self._compactor.join()
+        self._handle.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "reloads": self.reloads,
+                "appends": self.appends, "compactions": self.compactions, "logRecords": self._records}
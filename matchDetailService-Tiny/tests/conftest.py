@@ -0,0 +1,5 @@
+import os
+import sys
+
+# match_detail_app is imported the way run.py does: from the service directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
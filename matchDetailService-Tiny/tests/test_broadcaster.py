@@ -0,0 +1,143 @@
+"""RedisBroadcaster against an in-process pub/sub stand-in: echoes, seq gaps, bad input."""
+import asyncio
+import json
+
+from match_detail_app.realtime import ChannelManager, RedisBroadcaster, WSClient
+
+CHANNEL = "match-detail-updates:M1"
+
+
+class FakePubSub:
+    def __init__(self):
+        self.channels = {}
+        self.patterns = {}
+        self.inbox: asyncio.Queue = asyncio.Queue()
+
+    @property
+    def subscribed(self):
+        return bool(self.channels)
+
+    async def subscribe(self, *channels):
+        for channel in channels:
+            self.channels[channel] = None
+
+    async def unsubscribe(self, *channels):
+        for channel in channels:
+            self.channels.pop(channel, None)
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        try:
+            return await asyncio.wait_for(self.inbox.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def aclose(self):
+        pass
+
+
+class FakeRedis:
+    def __init__(self):
+        self.pubsubs = []
+
+    def pubsub(self):
+        self.pubsubs.append(FakePubSub())
+        return self.pubsubs[-1]
+
+    async def publish(self, channel, data):
+        for pubsub in self.pubsubs:
+            if channel in pubsub.channels:
+                pubsub.inbox.put_nowait({"type": "message", "channel": channel, "data": data})
+
+    async def aclose(self):
+        pass
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.received = []
+
+    async def send_text(self, text):
+        self.received.append(json.loads(text))
+
+
+async def _instance(redis: FakeRedis, instance_id: str):
+    broadcaster = RedisBroadcaster("redis://unused", instance_id=instance_id)
+    broadcaster._redis = redis
+    manager = ChannelManager(on_interest=broadcaster.set_interest)
+    applied = []
+    await broadcaster.start(manager, on_message=applied.append)
+    client = WSClient(websocket=FakeWebSocket(), match_id="M1")
+    await manager.register_ws(client)
+    while not broadcaster.stats()["subscribedMatches"]:
+        await asyncio.sleep(0.01)
+    return broadcaster, applied, client
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0.01)
+
+
+def _message(broadcaster: RedisBroadcaster, i: int) -> dict:
+    return broadcaster.stamp({"type": "stats.updated", "matchId": "M1", "payload": {"i": i}})
+
+
+def test_own_echo_is_skipped_and_foreign_message_applied_once():
+    async def main():
+        redis = FakeRedis()
+        a, a_applied, a_client = await _instance(redis, "A")
+        b, b_applied, b_client = await _instance(redis, "B")
+
+        await a.publish(_message(a, 1))
+        await _settle()
+
+        assert a.echoes == 1 and a.received == 0
+        assert a_applied == [] and a_client.websocket.received == []
+        assert b.echoes == 0 and b.received == 1
+        assert [m["payload"]["i"] for m in b_applied] == [1]
+        assert [m["payload"]["i"] for m in b_client.websocket.received] == [1]
+        assert b_client.websocket.received[0]["origin"] == "A"
+        await a.stop()
+        await b.stop()
+
+    asyncio.run(main())
+
+
+def test_seq_gap_from_another_instance_is_counted():
+    async def main():
+        redis = FakeRedis()
+        a, _, _ = await _instance(redis, "A")
+        b, b_applied, _ = await _instance(redis, "B")
+
+        for i in range(1, 6):
+            message = _message(a, i)
+            if i != 3:  # seq 3 is lost on the way
+                await a.publish(message)
+        await _settle()
+
+        assert [m["seq"] for m in b_applied] == [1, 2, 4, 5]
+        assert b.gaps == 1
+        assert a.stats()["gaps"] == 0
+        await a.stop()
+        await b.stop()
+
+    asyncio.run(main())
+
+
+def test_invalid_message_does_not_stop_the_listener():
+    async def main():
+        redis = FakeRedis()
+        a, _, _ = await _instance(redis, "A")
+        b, b_applied, _ = await _instance(redis, "B")
+
+        await redis.publish(CHANNEL, "not json")
+        await a.publish(_message(a, 1))
+        await _settle()
+
+        assert b.invalid == 1
+        assert [m["payload"]["i"] for m in b_applied] == [1]
+        assert b.reconnects == 0
+        await a.stop()
+        await b.stop()
+
+    asyncio.run(main())
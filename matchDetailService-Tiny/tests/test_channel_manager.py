@@ -0,0 +1,47 @@
+"""ChannelManager send queues under the ``snapshot`` slow-client policy."""
+import asyncio
+
+from match_detail_app.realtime import ChannelManager, WSClient
+
+
+class IdleWebSocket:
+    async def send_text(self, text):
+        pass
+
+
+def _client(*matches):
+    # not registered: nothing drains the queue, as with a stalled socket
+    return WSClient(websocket=IdleWebSocket(), matches=set(matches))
+
+
+def test_snapshot_policy_resyncs_when_every_match_has_a_snapshot():
+    async def main():
+        cached = {"M1": "snapshot M1", "M2": "snapshot M2"}
+        manager = ChannelManager(queue_size=3, slow_policy="snapshot", snapshot=cached.get)
+        client = _client("M1", "M2")
+        for i in range(3):
+            manager.send(client, f"M1 #{i}", "M1")
+        manager.send(client, "M2 #3", "M2")
+
+        assert sorted(client.pending) == ["snapshot M1", "snapshot M2"]
+        assert manager.resyncs == 1
+
+    asyncio.run(main())
+
+
+def test_snapshot_policy_keeps_messages_when_a_match_has_no_snapshot():
+    async def main():
+        cached = {"M1": "snapshot M1"}
+        manager = ChannelManager(queue_size=3, slow_policy="snapshot", snapshot=cached.get)
+        client = _client("M1", "M2")
+        manager.send(client, "M2 #0", "M2")
+        manager.send(client, "M1 #1", "M1")
+        manager.send(client, "M2 #2", "M2")
+        manager.send(client, "M1 #3", "M1")
+
+        # M2 can't be resynced: only the oldest message goes, as with drop_oldest
+        assert list(client.pending) == ["M1 #1", "M2 #2", "M1 #3"]
+        assert manager.resyncs == 0
+        assert manager.dropped == 1
+
+    asyncio.run(main())
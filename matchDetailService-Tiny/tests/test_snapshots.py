@@ -0,0 +1,107 @@
+"""SnapshotStore: concurrent readers of a cold match share one build."""
+import asyncio
+
+from match_detail_app.snapshots import SnapshotStore
+
+SUBSCRIBERS = 50
+
+
+class CountingBuild:
+    """Stand-in for DetailRepository.get_detail that counts upstream builds."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, match_id: str):
+        self.calls += 1
+        await self.release.wait()
+        return {"match": {"id": match_id}, "events": [], "lineups": {}, "stats": {}}
+
+
+async def _started(store: SnapshotStore):
+    while not store._inflight:
+        await asyncio.sleep(0)
+    # let every reader reach the shared build before it finishes
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_cold_match_is_built_once_for_concurrent_subscribers():
+    async def main():
+        build = CountingBuild()
+        store = SnapshotStore(build)
+        tasks = [asyncio.ensure_future(store.get("M1")) for _ in range(SUBSCRIBERS)]
+        await _started(store)
+        build.release.set()
+        snapshots = await asyncio.gather(*tasks)
+
+        assert build.calls == 1
+        assert store.builds == 1
+        assert store.coalesced == SUBSCRIBERS - 1
+        assert all(snapshot is snapshots[0] for snapshot in snapshots)
+        # the result was kept: the next reader is a hit
+        assert await store.get("M1") is snapshots[0]
+        assert store.hits == 1
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_build():
+    async def main():
+        build = CountingBuild()
+        store = SnapshotStore(build)
+        leaving = asyncio.ensure_future(store.get("M1"))
+        staying = [asyncio.ensure_future(store.get("M1")) for _ in range(3)]
+        await _started(store)
+        leaving.cancel()
+        await asyncio.sleep(0)
+        build.release.set()
+        snapshots = await asyncio.gather(*staying)
+
+        assert leaving.cancelled()
+        assert build.calls == 1
+        assert all(snapshot["match"]["id"] == "M1" for snapshot in snapshots)
+        assert store.peek("M1") is snapshots[0]
+
+    asyncio.run(main())
+
+
+def test_cancelling_the_first_reader_keeps_the_build_for_the_others():
+    async def main():
+        build = CountingBuild()
+        store = SnapshotStore(build)
+        first = asyncio.ensure_future(store.get("M1"))
+        await _started(store)
+        others = [asyncio.ensure_future(store.get("M1")) for _ in range(3)]
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        build.release.set()
+        snapshots = await asyncio.gather(*others)
+
+        assert build.calls == 1
+        assert store.coalesced == 3
+        assert all(snapshot is snapshots[0] for snapshot in snapshots)
+
+    asyncio.run(main())
+
+
+def test_build_started_before_follow_is_not_kept():
+    async def main():
+        build = CountingBuild()
+        store = SnapshotStore(build)
+        reader = asyncio.ensure_future(store.get("M1"))
+        await _started(store)
+        # the Redis subscription goes live while the build reads the old state
+        store.follow("M1", True)
+        build.release.set()
+        snapshot = await reader
+
+        assert snapshot["match"]["id"] == "M1"
+        assert store.peek("M1") is None
+        await store.get("M1")
+        assert build.calls == 2
+        assert store.peek("M1") is not None
+
+    asyncio.run(main())
@@ -9,6 +9,9 @@ CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost
 
 # 📦 Caminho do banco TinyDB
 DB_PATH = os.getenv("DB_PATH", "data/matches.json")
+# "json" (TinyDB) or "sqlite" (see sqlite_store.py)
+DB_STORAGE = os.getenv("DB_STORAGE", "sqlite" if DB_PATH.endswith((".db", ".sqlite")) else "json")
+STORAGE_READ_WORKERS = int(os.getenv("STORAGE_READ_WORKERS", "4"))
 
 # 🧱 Nome do serviço
 SERVICE_NAME = os.getenv("SERVICE_NAME", "matchesService - TinyDB")
@@ -20,3 +23,24 @@ COMPETITIONS_BASE_URL = os.getenv("COMPETITIONS_BASE_URL", "http://localhost:800
 # 🌐 Prefixo base e porta
 REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "3.0"))
 PORT = int(os.getenv("PORT", 8003))
+
+# 🔗 Pool HTTP compartilhado com os outros micros (timeout por dependência)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30.0"))
+TEAMS_TIMEOUT = float(os.getenv("TEAMS_TIMEOUT", REQUEST_TIMEOUT))
+COMPETITIONS_TIMEOUT = float(os.getenv("COMPETITIONS_TIMEOUT", REQUEST_TIMEOUT))
+
+# 🧵 Processos uvicorn (>1 desliga o reload; o TinyDB é protegido por lock de arquivo)
+WORKERS = int(os.getenv("WORKERS", "1"))
+
+# ✅ Validações de referência em paralelo (máximo simultâneo)
+VALIDATION_CONCURRENCY = int(os.getenv("VALIDATION_CONCURRENCY", "16"))
+
+# 🗃️ Cache de times/competições consultados (segundos; 404 fica menos tempo)
+REF_CACHE_TTL = float(os.getenv("REF_CACHE_TTL", "60"))
+REF_CACHE_NEGATIVE_TTL = float(os.getenv("REF_CACHE_NEGATIVE_TTL", "5"))
+REF_CACHE_MAX_SIZE = int(os.getenv("REF_CACHE_MAX_SIZE", "10000"))
+
+# 📣 Avisos de alteração de times/competições (limpam o cache): redis://... ou memory://
+CHANGE_FEED_URL = os.getenv("CHANGE_FEED_URL", "memory://")
@@ -1,4 +1,12 @@
 from tinydb import TinyDB
-from .config import DB_PATH
-db=TinyDB(DB_PATH)
+from .config import DB_PATH,DB_STORAGE,STORAGE_READ_WORKERS
+from .executor import StorageExecutor
+from .sqlite_store import SQLiteDB
+from .storage import CachedJSONStorage,SharedTable
+if DB_STORAGE=='sqlite':
+ db=SQLiteDB(DB_PATH)
+else:
+ db=TinyDB(DB_PATH,storage=CachedJSONStorage)
+ db.table_class=SharedTable
+db_executor=StorageExecutor(STORAGE_READ_WORKERS)
 matches_table=db.table('matches')
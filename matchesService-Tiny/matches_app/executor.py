@@ -0,0 +1,152 @@
+"""Keeps blocking TinyDB calls off the asyncio event loop.
+
+``StorageExecutor.read`` runs a callable on a bounded thread pool; reads may
+run concurrently with each other. ``StorageExecutor.write`` runs it on a
+single writer thread, so writes are applied one at a time and exclude readers
+while they run. ``LoopLagMonitor`` measures how late the loop wakes up from a
+sleep, which is how long something kept it busy.
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class RWLock:
+    """Many readers or one writer; waiting writers block new readers."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+
+class StorageExecutor:
+    """Threads start on first use; after ``shutdown`` the next call starts new ones.
+
+    ``db_executor`` is created at import time and outlives the app lifespan,
+    which may be entered again in the same process (tests, reloads).
+    """
+
+    def __init__(self, max_readers: int = 4):
+        self.max_readers = max_readers
+        self._readers: Optional[ThreadPoolExecutor] = None
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._pools_lock = threading.Lock()
+        self._lock = RWLock()
+        self.pending_reads = 0
+        self.pending_writes = 0
+
+    def _pools(self) -> Tuple[ThreadPoolExecutor, ThreadPoolExecutor]:
+        with self._pools_lock:
+            if self._writer is None:
+                self._readers = ThreadPoolExecutor(max_workers=self.max_readers, thread_name_prefix="storage-read")
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage-write")
+            return self._readers, self._writer
+
+    def _locked_read(self, fn: Callable[[], Any]) -> Any:
+        self._lock.acquire_read()
+        try:
+            return fn()
+        finally:
+            self._lock.release_read()
+
+    def _locked_write(self, fn: Callable[[], Any]) -> Any:
+        self._lock.acquire_write()
+        try:
+            return fn()
+        finally:
+            self._lock.release_write()
+
+    async def read(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        self.pending_reads += 1
+        try:
+            return await loop.run_in_executor(self._pools()[0], self._locked_read, functools.partial(fn, *args, **kwargs))
+        finally:
+            self.pending_reads -= 1
+
+    async def write(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        self.pending_writes += 1
+        try:
+            return await loop.run_in_executor(self._pools()[1], self._locked_write, functools.partial(fn, *args, **kwargs))
+        finally:
+            self.pending_writes -= 1
+
+    def shutdown(self):
+        """Finish the queued calls and stop the threads."""
+        with self._pools_lock:
+            readers, writer = self._readers, self._writer
+            self._readers = self._writer = None
+        if writer is not None:
+            readers.shutdown(wait=True)
+            writer.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {"pendingReads": self.pending_reads, "pendingWrites": self.pending_writes}
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.last = 0.0
+        self.max = 0.0
+        self._total = 0.0
+        self._samples = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self.last = lag
+            self.max = max(self.max, lag)
+            self._total += lag
+            self._samples += 1
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, float]:
+        avg = self._total / self._samples if self._samples else 0.0
+        return {"lastMs": round(self.last * 1000, 3), "maxMs": round(self.max * 1000, 3), "avgMs": round(avg * 1000, 3)}
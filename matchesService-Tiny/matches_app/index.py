@@ -0,0 +1,234 @@
+"""In-memory indexes kept alongside TinyDB tables.
+
+On the SQLite backend (see sqlite_store.py) the same interfaces are answered
+by the database's own indexes and nothing is kept in memory.
+"""
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from tinydb.table import Document, Table
+
+
+class IdIndex:
+    """Maps a unique document field (``id`` by default) to its TinyDB doc_id.
+
+    Lookups go straight to ``table.get(doc_id=...)`` instead of scanning the
+    table with ``Query().id == x``. The index is rebuilt whenever the storage
+    reloads the file from disk, or when an entry turns out to be stale.
+
+    On the SQLite backend (a table with ``find_ids``) the lookup is a query on
+    an expression index instead, and nothing is kept in memory.
+    """
+
+    def __init__(self, table: Table, field: str = "id"):
+        self._table = table
+        self._field = field
+        self._ids: Dict[Any, int] = {}
+        self._reloads = -1
+        self._native = hasattr(table, "find_ids")
+        if self._native:
+            table.ensure_index(field)
+        else:
+            self.rebuild()
+
+    def rebuild(self):
+        if self._native:
+            return
+        self._ids = {doc[self._field]: doc.doc_id for doc in self._table.all() if self._field in doc}
+        self._reloads = getattr(self._table.storage, "reloads", 0)
+
+    def _sync(self):
+        self._table.storage.read()
+        if getattr(self._table.storage, "reloads", 0) != self._reloads:
+            self.rebuild()
+
+    def doc_id(self, key: Any) -> Optional[int]:
+        if self._native:
+            found = self._table.find_ids((self._field,), key)
+            return found[0] if found else None
+        self._sync()
+        return self._ids.get(key)
+
+    def get(self, key: Any) -> Optional[Document]:
+        doc_id = self.doc_id(key)
+        if doc_id is None:
+            return None
+        doc = self._table.get(doc_id=doc_id)
+        if doc is None or doc.get(self._field) != key:
+            self.rebuild()
+            doc_id = self._ids.get(key)
+            doc = self._table.get(doc_id=doc_id) if doc_id is not None else None
+        return doc
+
+    def add(self, key: Any, doc_id: int):
+        if not self._native:
+            self._ids[key] = doc_id
+
+    def discard(self, key: Any):
+        self._ids.pop(key, None)
+
+    def __len__(self):
+        return len(self._table) if self._native else len(self._ids)
+
+
+class FieldIndex:
+    """Inverted index from a field value to the doc_ids holding it.
+
+    Several fields may feed the same index, e.g. ``homeTeamId`` and
+    ``awayTeamId`` both feed a "team" index so that one lookup finds the
+    matches a team plays on either side.
+    """
+
+    def __init__(self, table: Table, *fields: str):
+        self._table = table
+        self._fields = fields
+        self._values: Dict[Any, Set[int]] = {}
+        self._reloads = -1
+        self._native = hasattr(table, "find_ids")
+        if self._native:
+            table.ensure_index(*fields)
+        else:
+            self.rebuild()
+
+    def rebuild(self):
+        if self._native:
+            return
+        # build aside and swap, readers on other threads keep the old one
+        values: Dict[Any, Set[int]] = {}
+        for doc in self._table.all():
+            for field in self._fields:
+                value = doc.get(field)
+                if value is not None:
+                    values.setdefault(value, set()).add(doc.doc_id)
+        self._values = values
+        self._reloads = getattr(self._table.storage, "reloads", 0)
+
+    def _sync(self):
+        self._table.storage.read()
+        if getattr(self._table.storage, "reloads", 0) != self._reloads:
+            self.rebuild()
+
+    def add(self, doc_id: int, doc: Dict[str, Any]):
+        if self._native:
+            return
+        for field in self._fields:
+            value = doc.get(field)
+            if value is not None:
+                self._values.setdefault(value, set()).add(doc_id)
+
+    def remove(self, doc_id: int, doc: Dict[str, Any]):
+        for field in self._fields:
+            ids = self._values.get(doc.get(field))
+            if ids is not None:
+                ids.discard(doc_id)
+                if not ids:
+                    self._values.pop(doc.get(field))
+
+    def lookup(self, value: Any) -> Set[int]:
+        if self._native:
+            return set(self._table.find_ids(self._fields, value))
+        self._sync()
+        return self._values.get(value, set())
+
+
+class SortedIndex:
+    """Keeps ``(key(doc[field]), doc_id)`` pairs sorted for range scans.
+
+    ``key`` normalizes the raw value once, at index time (e.g. an ISO date
+    string to an epoch float); documents whose value it cannot convert
+    (returns ``None``) are left out of the index.
+    """
+
+    def __init__(self, table: Table, field: str, key: Callable[[Any], Optional[float]]):
+        self._table = table
+        self._field = field
+        self._key = key
+        self._entries: List[Tuple[float, int]] = []
+        self._by_doc: Dict[int, float] = {}
+        self._reloads = -1
+        self._native = hasattr(table, "range_ids")
+        if self._native:
+            table.ensure_key(field, key)
+        else:
+            self.rebuild()
+
+    def rebuild(self):
+        if self._native:
+            return
+        entries: List[Tuple[float, int]] = []
+        by_doc: Dict[int, float] = {}
+        for doc in self._table.all():
+            value = self._key(doc.get(self._field))
+            if value is not None:
+                entries.append((value, doc.doc_id))
+                by_doc[doc.doc_id] = value
+        entries.sort()
+        self._entries, self._by_doc = entries, by_doc
+        self._reloads = getattr(self._table.storage, "reloads", 0)
+
+    def _sync(self):
+        self._table.storage.read()
+        if getattr(self._table.storage, "reloads", 0) != self._reloads:
+            self.rebuild()
+
+    def add(self, doc_id: int, doc: Dict[str, Any]):
+        value = self._key(doc.get(self._field))
+        if value is not None and not self._native:
+            insort(self._entries, (value, doc_id))
+            self._by_doc[doc_id] = value
+
+    def remove(self, doc_id: int, doc: Optional[Dict[str, Any]] = None):
+        value = self._by_doc.pop(doc_id, None)
+        if value is None:
+            return
+        i = bisect_left(self._entries, (value, doc_id))
+        if i < len(self._entries) and self._entries[i] == (value, doc_id):
+            del self._entries[i]
+
+    def range(self, lo: Optional[float] = None, hi: Optional[float] = None,
+              within: Optional[Set[int]] = None) -> List[int]:
+        """Doc_ids with ``lo <= value <= hi``, in value order.
+
+        ``within`` restricts the result to a candidate set; when that set is
+        smaller than the range it is checked directly instead of walking it.
+        On the SQLite backend both cases are one query on the key column.
+        """
+        if self._native:
+            return self._table.range_ids(self._field, lo, hi, within)
+        self._sync()
+        start = 0 if lo is None else bisect_left(self._entries, (lo,))
+        end = len(self._entries) if hi is None else bisect_right(self._entries, (hi, float("inf")))
+        if within is None:
+            return [doc_id for _, doc_id in self._entries[start:end]]
+        if len(within) < end - start:
+            hits = []
+            for doc_id in within:
+                value = self._by_doc.get(doc_id)
+                if value is not None and (lo is None or value >= lo) and (hi is None or value <= hi):
+                    hits.append((value, doc_id))
+            return [doc_id for _, doc_id in sorted(hits)]
+        return [doc_id for _, doc_id in self._entries[start:end] if doc_id in within]
+
+
+def intersect(candidates: List[Set[int]]) -> Set[int]:
+    """Intersect doc_id sets, smallest first so the work is bounded by it."""
+    candidates = sorted(candidates, key=len)
+    result = set(candidates[0])
+    for ids in candidates[1:]:
+        if not result:
+            break
+        result &= ids
+    return result
+
+
+def documents(table: Table, doc_ids: Iterable[int]) -> List[Document]:
+    """Fetch documents by doc_id with a single storage read, in the given order."""
+    if hasattr(table, "documents"):
+        return table.documents(doc_ids)
+    raw = (table.storage.read() or {}).get(table.name, {})
+    docs = []
+    for doc_id in doc_ids:
+        doc = raw.get(str(doc_id))
+        if doc is not None:
+            docs.append(Document(doc, doc_id))
+    return docs
@@ -1,7 +1,33 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .config import CORS_ORIGINS,SERVICE_NAME
+from .database import db,db_executor
+from .change_feed import change_feed
+from .executor import LoopLagMonitor
+from .http_client import http_client
+from .ref_cache import competition_cache,team_cache
 from .routes import router
-app=FastAPI(title=SERVICE_NAME)
+loop_lag=LoopLagMonitor()
+
+@asynccontextmanager
+async def lifespan(app:FastAPI):
+ loop_lag.start()
+ await http_client.start()
+ change_feed.subscribe('teams',lambda change:team_cache.invalidate(change['id']),team_cache.clear)
+ change_feed.subscribe('competitions',lambda change:competition_cache.invalidate(change['id']),competition_cache.clear)
+ await change_feed.start()
+ yield
+ await change_feed.stop()
+ await http_client.aclose()
+ await loop_lag.stop()
+ db_executor.shutdown()
+
+app=FastAPI(title=SERVICE_NAME,lifespan=lifespan)
 app.add_middleware(CORSMiddleware,allow_origins=CORS_ORIGINS,allow_methods=['*'],allow_headers=['*'])
 app.include_router(router)
+
+@app.get('/metrics',summary='Storage, event loop, HTTP pool, reference cache and change feed counters')
+async def metrics():
+ return {'storage':db.storage.stats(),'executor':db_executor.stats(),'loopLag':loop_lag.stats(),'http':http_client.stats(),
+  'refCache':{'teams':team_cache.stats(),'competitions':competition_cache.stats()},'changeFeed':change_feed.stats()}
@@ -0,0 +1,157 @@
+"""In-process cache for documents owned by other services.
+
+Teams and competitions hardly ever change, yet every write here used to look
+them up over HTTP. ``RefCache`` keeps the looked-up documents for ``ttl``
+seconds and remembers "not found" (the loader returned ``None``) for the
+shorter ``negative_ttl``. At most ``max_size`` keys are kept; the least
+recently used one is evicted first.
+
+Concurrent lookups of the same key share one load: the first caller starts it
+as a task and the others await the same task. A caller that is cancelled does
+not cancel the load for the rest. Loader errors (service down, 5xx) are
+raised to every waiter and never cached.
+
+``invalidate``/``clear`` (called from change_feed.py when the owning service
+reports an edit) also keep a load that was already running from storing
+what it read before the edit.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional
+
+from .config import REF_CACHE_MAX_SIZE, REF_CACHE_NEGATIVE_TTL, REF_CACHE_TTL
+
+
+class RefCache:
+    def __init__(self, ttl: float = 60.0, negative_ttl: float = 5.0, max_size: int = 10000):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._epoch = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _lookup(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires, value = entry
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        if value is None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return True, value
+
+    def _store(self, key: Hashable, value: Any):
+        ttl = self.ttl if value is not None else self.negative_ttl
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def _load(self, keys: List[Hashable], load: Callable[[], Awaitable[Dict[Hashable, Any]]]):
+        epoch = self._epoch
+        try:
+            values = await load()
+            found = {key: values.get(key) for key in keys}
+            if epoch == self._epoch:
+                for key, value in found.items():
+                    self._store(key, value)
+            return found
+        finally:
+            for key in keys:
+                if self._inflight.get(key) is asyncio.current_task():
+                    del self._inflight[key]
+
+    def _start(self, keys: List[Hashable], load: Callable[[], Awaitable[Dict[Hashable, Any]]]) -> asyncio.Task:
+        task = asyncio.ensure_future(self._load(keys, load))
+        # every waiter may have gone away: don't warn about an unretrieved error
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        for key in keys:
+            self._inflight[key] = task
+        return task
+
+    async def get(self, key: Hashable, load: Callable[[], Awaitable[Optional[Any]]]) -> Optional[Any]:
+        """Return the cached value for ``key``, or ``await load()`` (``None`` = not found)."""
+        cached, value = self._lookup(key)
+        if cached:
+            return value
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+
+            async def load_one():
+                return {key: await load()}
+
+            task = self._start([key], load_one)
+        else:
+            self.coalesced += 1
+        return (await asyncio.shield(task))[key]
+
+    async def get_many(self, keys: Iterable[Hashable],
+                       load_many: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]) -> Dict[Hashable, Any]:
+        """Like ``get`` for several keys; the misses are loaded with one ``load_many(keys)``.
+
+        ``load_many`` returns ``{key: value}``; keys it leaves out are not found.
+        """
+        result: Dict[Hashable, Any] = {}
+        waiting: Dict[Hashable, asyncio.Task] = {}
+        to_load: List[Hashable] = []
+        for key in dict.fromkeys(keys):
+            cached, value = self._lookup(key)
+            if cached:
+                result[key] = value
+            elif key in self._inflight:
+                self.coalesced += 1
+                waiting[key] = self._inflight[key]
+            else:
+                to_load.append(key)
+        if to_load:
+            self.misses += len(to_load)
+            task = self._start(to_load, lambda: load_many(to_load))
+            for key in to_load:
+                waiting[key] = task
+        for key, task in waiting.items():
+            result[key] = (await asyncio.shield(task))[key]
+        return result
+
+    def invalidate(self, key: Hashable):
+        self._epoch += 1
+        self._entries.pop(key, None)
+        self._inflight.pop(key, None)
+        self.invalidations += 1
+
+    def clear(self):
+        self._epoch += 1
+        self._entries.clear()
+        self._inflight.clear()
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "negativeHits": self.negative_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+team_cache = RefCache(ttl=REF_CACHE_TTL, negative_ttl=REF_CACHE_NEGATIVE_TTL, max_size=REF_CACHE_MAX_SIZE)
+competition_cache = RefCache(ttl=REF_CACHE_TTL, negative_ttl=REF_CACHE_NEGATIVE_TTL, max_size=REF_CACHE_MAX_SIZE)
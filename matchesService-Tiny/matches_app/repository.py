@@ -1,43 +1,97 @@
-from tinydb import Query
-from datetime import datetime, timezone, date
-import json
+from datetime import datetime, timezone
 from .database import matches_table
+from .encoding import to_jsonable
+from .index import IdIndex, FieldIndex, SortedIndex, intersect, documents
+
+
+def _to_epoch(value):
+    """Normalize a scheduledAt value (datetime, ISO string or epoch) to UTC epoch seconds."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
 
 class MatchesRepository:
     def __init__(self):
         # use a private attribute for the underlying table
         self._table = matches_table
+        self._by_id = IdIndex(self._table)
+        # inverted indexes used by list_matches; teamId covers home and away
+        self._filter_indexes = {
+            'competitionId': FieldIndex(self._table, 'competitionId'),
+            'teamId': FieldIndex(self._table, 'homeTeamId', 'awayTeamId'),
+            'status': FieldIndex(self._table, 'status'),
+            'sport': FieldIndex(self._table, 'sport'),
+        }
+        # scheduledAt parsed once per write into a sorted epoch index
+        self._by_time = SortedIndex(self._table, 'scheduledAt', key=_to_epoch)
+
+    def _index(self, doc_id, doc):
+        for index in self._filter_indexes.values():
+            index.add(doc_id, doc)
+        self._by_time.add(doc_id, doc)
+
+    def _unindex(self, doc_id, doc):
+        for index in self._filter_indexes.values():
+            index.remove(doc_id, doc)
+        self._by_time.remove(doc_id, doc)
 
     def _serialize(self, doc):
         """Prepare a document for storage/return (convert datetimes, etc.)."""
-        return json.loads(json.dumps(doc, default=str, ensure_ascii=False))
+        return to_jsonable(doc)
 
     def insert(self, match):
         serialized = self._serialize(match)
-        self._table.insert(serialized)
+        doc_id = self._table.insert(serialized)
+        self._by_id.add(serialized.get('id'), doc_id)
+        self._index(doc_id, serialized)
         return serialized
 
     def get_by_id(self, match_id):
-        results = self._table.search(Query().id == match_id)
-        return results[0] if results else None
+        return self._by_id.get(match_id)
 
     # backward-compatible alias
     def get(self, id):
         return self.get_by_id(id)
 
     def update_by_id(self, match_id, patch):
-        if not self.get_by_id(match_id):
-            return None
-        serialized = self._serialize(patch)
-        self._table.update(serialized, Query().id == match_id)
-        return self.get_by_id(match_id)
+        with self._table.storage.transaction():
+            doc_id = self._by_id.doc_id(match_id)
+            if doc_id is None:
+                return None
+            serialized = self._serialize(patch)
+            self._unindex(doc_id, self._table.get(doc_id=doc_id))
+            self._table.update(serialized, doc_ids=[doc_id])
+            new_id = serialized.get('id', match_id)
+            if new_id != match_id:
+                self._by_id.discard(match_id)
+                self._by_id.add(new_id, doc_id)
+            updated = self._table.get(doc_id=doc_id)
+            self._index(doc_id, updated)
+            return updated
 
     # backward-compatible alias
     def update(self, id, patch):
         return self.update_by_id(id, patch)
 
     def delete_by_id(self, match_id):
-        return bool(self._table.remove(Query().id == match_id))
+        with self._table.storage.transaction():
+            doc_id = self._by_id.doc_id(match_id)
+            if doc_id is None:
+                return False
+            self._by_id.discard(match_id)
+            self._unindex(doc_id, self._table.get(doc_id=doc_id))
+            return bool(self._table.remove(doc_ids=[doc_id]))
 
     # backward-compatible alias
     def remove(self, id):
@@ -50,46 +104,37 @@ class MatchesRepository:
         - list_matches(filters={...}, limit=.., offset=..)
         - list_matches(competitionId=..., teamId=..., status=..., sport=..., upcoming=True, limit=.., offset=..)
         Route currently invokes: repo.list(competitionId=..., teamId=..., limit=..., offset=...)
+
+        ``from``/``to`` (datetime, ISO string or epoch seconds) restrict
+        scheduledAt to a window; windowed and upcoming results are returned in
+        schedule order, so ``upcoming=True, limit=N`` gives the next N matches.
         """
         filters = (filters or {}).copy()
         # Merge direct keyword filters (backward compatibility with current router usage)
-        for key in ["status", "sport", "competitionId", "teamId", "upcoming"]:
+        for key in ["status", "sport", "competitionId", "teamId", "upcoming", "from", "to"]:
             if key in kwargs and kwargs[key] is not None:
                 filters[key] = kwargs[key]
-        all_items = self._table.all()
-
-        def _parse_datetime(dt):
-            try:
-                if isinstance(dt, str) and dt.endswith('Z'):
-                    dt = dt.replace('Z', '+00:00')
-                return datetime.fromisoformat(dt)
-            except Exception:
-                return None
+        # upcoming == scheduled and not started yet
+        lo, hi = _to_epoch(filters.get('from')), _to_epoch(filters.get('to'))
+        if filters.get('upcoming'):
+            now = datetime.now(timezone.utc).timestamp()
+            lo = now if lo is None else max(lo, now)
+            filters['status'] = filters.get('status') or 'SCHEDULED'
+            if filters['status'] != 'SCHEDULED':
+                return {'items': [], 'total': 0}
 
-        def _filter_match(item):
-            # status filter
-            if filters.get('status') and item.get('status') != filters['status']:
-                return False
-            # sport filter
-            if filters.get('sport') and item.get('sport') != filters['sport']:
-                return False
-            # competition filter (note: underlying data keys kept as-is)
-            if filters.get('competitionId') and item.get('competitionId') != filters['competitionId']:
-                return False
-            # team filter: either home or away
-            if filters.get('teamId') and item.get('homeTeamId') != filters['teamId'] and item.get('awayTeamId') != filters['teamId']:
-                return False
-            # upcoming filter uses scheduledAt
-            dt = _parse_datetime(item.get('scheduledAt'))
-            if filters.get('upcoming'):
-                now = datetime.now(timezone.utc)
-                if not dt or not (item.get('status') == 'SCHEDULED' and dt >= now):
-                    return False
-            return True
-
-        filtered_items = [i for i in all_items if _filter_match(i)]
-        total = len(filtered_items)
-        return {'items': filtered_items[offset:offset+limit], 'total': total}
+        # narrow the candidates with the inverted indexes (smallest set first)
+        candidates = [index.lookup(filters[key]) for key, index in self._filter_indexes.items() if filters.get(key)]
+        within = intersect(candidates) if candidates else None
+        if lo is not None or hi is not None:
+            # time window: bisect range scan, already in schedule order
+            doc_ids = self._by_time.range(lo, hi, within)
+        elif within is not None:
+            doc_ids = sorted(within)
+        else:
+            all_items = self._table.all()
+            return {'items': all_items[offset:offset+limit], 'total': len(all_items)}
+        return {'items': documents(self._table, doc_ids[offset:offset+limit]), 'total': len(doc_ids)}
 
     # backward-compatible alias (routes call repo.list(...))
     list = list_matches
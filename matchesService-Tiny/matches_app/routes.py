@@ -1,4 +1,6 @@
-from fastapi import APIRouter, HTTPException, status
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Query, status
 from typing import Optional
 from uuid import uuid4
 from datetime import datetime, timezone
@@ -7,7 +9,10 @@ import httpx
 
 from .models import MatchIn, MatchOut
 from .repository import MatchesRepository
-from .config import TEAMS_BASE_URL, COMPETITIONS_BASE_URL, REQUEST_TIMEOUT
+from .config import TEAMS_BASE_URL, COMPETITIONS_BASE_URL, VALIDATION_CONCURRENCY
+from .database import db_executor
+from .http_client import http_client
+from .ref_cache import competition_cache, team_cache
 
 router = APIRouter()
 repo = MatchesRepository()
@@ -18,34 +23,72 @@ async def root():
     return {"service": "matchesService", "status": "ok"}
 
 
-async def _check_team_exists(team_id: str):
-    async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT) as client:
-        r = await client.get(f"{TEAMS_BASE_URL}/api/v1/teams/{team_id}")
-    if r.status_code != 200:
+async def _load_teams(team_ids: list):
+    r = await http_client.post("teams", f"{TEAMS_BASE_URL}/api/v1/teams:batchGet", json={"ids": team_ids})
+    r.raise_for_status()
+    return {team["id"]: team for team in r.json()["data"]}
+
+
+async def _load_competition(competition_id: str):
+    r = await http_client.get("competitions", f"{COMPETITIONS_BASE_URL}/api/v1/competitions/{competition_id}")
+    if r.status_code == 404:
+        return None
+    r.raise_for_status()
+    return r.json()
+
+
+async def _check_teams_exist(team_ids: list):
+    teams = await team_cache.get_many(team_ids, _load_teams)
+    missing = [team_id for team_id in team_ids if teams[team_id] is None]
+    if missing:
         raise HTTPException(
             status_code=400,
-            detail=f"Team '{team_id}' not found in teamsService"
+            detail=f"Team '{missing[0]}' not found in teamsService"
         )
 
 
 async def _check_competition_exists(competition_id: str):
-    async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT) as client:
-        r = await client.get(f"{COMPETITIONS_BASE_URL}/api/v1/competitions/{competition_id}")
-    if r.status_code != 200:
+    competition = await competition_cache.get(competition_id, lambda: _load_competition(competition_id))
+    if competition is None:
         raise HTTPException(
             status_code=400,
             detail=f"Competition '{competition_id}' not found in competitionsService"
         )
 
 
+async def _check_all(checks, limit: int = VALIDATION_CONCURRENCY):
+    """Await the reference checks concurrently, at most ``limit`` at a time.
+
+    The first check that fails (missing reference or unreachable service)
+    is raised at once and the remaining ones are cancelled.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(check):
+        try:
+            async with semaphore:
+                await check
+        finally:
+            check.close()  # cancelled while queued: never started
+
+    tasks = [asyncio.ensure_future(bounded(check)) for check in checks]
+    try:
+        for done in asyncio.as_completed(tasks):
+            await done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
 @router.post("/api/v1/matches", response_model=MatchOut, status_code=status.HTTP_201_CREATED)
 async def create_match(match: MatchIn):
     # 1) valida se times e competição existem em outros micros
     try:
-        await _check_team_exists(match.homeTeamId)
-        await _check_team_exists(match.awayTeamId)
-        await _check_competition_exists(match.competitionId)
-    except httpx.RequestError:
+        await _check_all([
+            _check_teams_exist(list(dict.fromkeys([match.homeTeamId, match.awayTeamId]))),
+            _check_competition_exists(match.competitionId),
+        ])
+    except (httpx.RequestError, httpx.HTTPStatusError):
         # algum micro está offline
         raise HTTPException(
             status_code=503,
@@ -56,11 +99,11 @@ async def create_match(match: MatchIn):
     doc = match.model_dump()
     doc["id"] = f"MATCH_{uuid4().hex[:8].upper()}"
     doc["createdAt"] = datetime.now(timezone.utc).isoformat()
-    return repo.insert(doc)
+    return await db_executor.write(repo.insert, doc)
 
 @router.get("/api/v1/matches/{match_id}", response_model=MatchOut, summary="Get a match by ID")
 async def get_match(match_id: str):
-    match = repo.get_by_id(match_id)
+    match = await db_executor.read(repo.get_by_id, match_id)
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
     return match
@@ -70,10 +113,19 @@ async def get_match(match_id: str):
 async def list_matches(
     competitionId: Optional[str] = None,
     teamId: Optional[str] = None,
+    status: Optional[str] = None,
+    sport: Optional[str] = None,
+    upcoming: bool = False,
+    from_: Optional[datetime] = Query(default=None, alias="from", description="scheduledAt >= from"),
+    to: Optional[datetime] = Query(default=None, description="scheduledAt <= to"),
     limit: int = 20,
     offset: int = 0,
 ):
-    res = repo.list(competitionId=competitionId, teamId=teamId, limit=limit, offset=offset)
+    res = await db_executor.read(
+        repo.list,
+        competitionId=competitionId, teamId=teamId, status=status, sport=sport,
+        upcoming=upcoming or None, limit=limit, offset=offset, **{"from": from_, "to": to},
+    )
     return {
         "data": res["items"],
         "meta": {
@@ -0,0 +1,376 @@
+"""SQLite backend exposing the part of TinyDB's API the repositories use.
+
+Selected with ``DB_STORAGE=sqlite`` (or a ``DB_PATH`` ending in ``.db``).
+Each table is ``(doc_id INTEGER PRIMARY KEY, doc TEXT)`` holding the same JSON
+documents TinyDB would, so repositories keep working with ``insert``,
+``get(doc_id=...)``, ``search(Query()...)``, ``update``, ``remove`` and friends.
+
+Fields documents are looked up by get an expression index on
+``json_extract(doc, '$.field')``. Equality conditions of a TinyDB ``Query``
+(alone or joined with ``&``) become an indexed ``WHERE``; the condition is
+still checked in Python afterwards, so whatever the translation does not
+cover falls back to a scan and returns exactly what TinyDB would.
+``ensure_key`` adds a real column computed in Python (e.g. a date parsed to
+epoch seconds) for ordered range scans.
+
+The file runs in WAL mode and every thread gets its own connection, so the
+executor's readers never wait for the writer. SQL text is fixed per table and
+field, which lets the ``sqlite3`` per-connection statement cache reuse the
+prepared statements.
+
+One-shot migration from a TinyDB JSON file::
+
+    python -m matches_app.sqlite_store data/matches.json data/matches.db
+"""
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from tinydb.table import Document
+
+_FIELD = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _json_path(path: Sequence[Any]) -> Optional[str]:
+    if not path or not all(isinstance(p, str) and _FIELD.match(p) for p in path):
+        return None
+    return "$." + ".".join(path)
+
+
+def _expr(path: str) -> str:
+    # must be spelled exactly like the indexed expression for SQLite to use it
+    return f"json_extract(doc, '{path}')"
+
+
+def _translate(hashval: Any) -> Optional[Tuple[str, List[Any]]]:
+    """WHERE clause implied by a TinyDB query hash (``==``, possibly AND-ed)."""
+    if not isinstance(hashval, tuple) or not hashval:
+        return None
+    if hashval[0] == "==" and len(hashval) == 3 and type(hashval[2]) in (str, int, float, bool):
+        path = _json_path(hashval[1])
+        return (f"{_expr(path)} = ?", [hashval[2]]) if path else None
+    if hashval[0] == "and":
+        parts = sorted(filter(None, map(_translate, hashval[1])), key=lambda part: part[0])
+        if not parts:
+            return None
+        return " AND ".join(sql for sql, _ in parts), [value for _, params in parts for value in params]
+    return None
+
+
+class SQLiteStorage:
+    """Per-thread connections to one SQLite file plus write transactions."""
+
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        self.reads = 0
+        self.writes = 0
+        self.connection().execute("PRAGMA journal_mode=WAL")
+
+    def connection(self) -> sqlite3.Connection:
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            # first use on this thread, or inherited through a fork
+            conn = sqlite3.connect(self.path, timeout=self._busy_timeout, isolation_level=None,
+                                   check_same_thread=False, cached_statements=256)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            local.conn, local.depth, local.pid = conn, 0, os.getpid()
+            with self._lock:
+                self._connections.append(conn)
+        return local.conn
+
+    @contextmanager
+    def transaction(self):
+        """``BEGIN IMMEDIATE`` ... ``COMMIT``; re-entrant within the owning thread."""
+        conn = self.connection()
+        local = self._local
+        outer = not local.depth
+        if outer:
+            conn.execute("BEGIN IMMEDIATE")
+        local.depth += 1
+        try:
+            yield self
+            if outer:
+                conn.execute("COMMIT")
+        except BaseException:
+            if outer:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            local.depth -= 1
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "sqlite", "reads": self.reads, "writes": self.writes,
+                "connections": len(self._connections)}
+
+
+class SQLiteTable:
+    def __init__(self, storage: SQLiteStorage, name: str):
+        self._storage = storage
+        self.name = name
+        self._table = _quote(name)
+        self._keys: Dict[str, Callable[[Any], Optional[float]]] = {}
+        with storage.transaction():
+            storage.connection().execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table} (doc_id INTEGER PRIMARY KEY, doc TEXT NOT NULL)"
+            )
+        self._prepare()
+
+    @property
+    def storage(self) -> SQLiteStorage:
+        return self._storage
+
+    def _prepare(self):
+        columns = "".join(f", {_quote('k_' + field)}" for field in self._keys)
+        marks = ", ?" * len(self._keys)
+        sets = "".join(f", {_quote('k_' + field)} = ?" for field in self._keys)
+        self._insert_sql = f"INSERT INTO {self._table} (doc_id, doc{columns}) VALUES (?, ?{marks})"
+        self._update_sql = f"UPDATE {self._table} SET doc = ?{sets} WHERE doc_id = ?"
+
+    def _key_values(self, doc: Mapping) -> List[Optional[float]]:
+        return [key(doc.get(field)) for field, key in self._keys.items()]
+
+    def _query(self, sql: str, params: Sequence[Any] = ()) -> List[tuple]:
+        self._storage.reads += 1
+        return self._storage.connection().execute(sql, params).fetchall()
+
+    def _execute(self, sql: str, params: Sequence[Any] = ()) -> sqlite3.Cursor:
+        self._storage.writes += 1
+        return self._storage.connection().execute(sql, params)
+
+    @staticmethod
+    def _documents(rows: Iterable[tuple]) -> List[Document]:
+        return [Document(json.loads(doc), doc_id) for doc_id, doc in rows]
+
+    # --- indexes -------------------------------------------------------
+
+    def ensure_index(self, *fields: str):
+        """Expression index on each top-level field (no-op when it exists)."""
+        with self._storage.transaction():
+            for field in fields:
+                path = _json_path((field,))
+                if path is None:
+                    raise ValueError(f"cannot index field {field!r}")
+                index = _quote(f"ix_{self.name}_{field}")
+                self._execute(f"CREATE INDEX IF NOT EXISTS {index} ON {self._table} ({_expr(path)})")
+
+    def ensure_key(self, field: str, key: Callable[[Any], Optional[float]]):
+        """Indexed ``k_<field>`` column holding ``key(doc[field])`` for range scans."""
+        column = "k_" + field
+        with self._storage.transaction():
+            existing = {row[1] for row in self._query(f"PRAGMA table_info({self._table})")}
+            if column not in existing:
+                self._execute(f"ALTER TABLE {self._table} ADD COLUMN {_quote(column)} REAL")
+                self._execute(f"CREATE INDEX IF NOT EXISTS {_quote(f'ix_{self.name}_{column}')} "
+                              f"ON {self._table} ({_quote(column)}, doc_id)")
+            # rows written without the key (migrate, a process that never called
+            # ensure_key) would be left out of range_ids: fill them in every time
+            path = _json_path((field,))
+            present = f" AND {_expr(path)} IS NOT NULL" if path else ""
+            missing = self._query(f"SELECT doc_id, doc FROM {self._table} WHERE {_quote(column)} IS NULL{present}")
+            for doc_id, doc in missing:
+                value = key(json.loads(doc).get(field))
+                if value is not None:
+                    self._execute(f"UPDATE {self._table} SET {_quote(column)} = ? WHERE doc_id = ?", (value, doc_id))
+            self._keys[field] = key
+            self._prepare()
+
+    def find_ids(self, fields: Sequence[str], value: Any) -> List[int]:
+        """doc_ids whose value for any of ``fields`` equals ``value``."""
+        where = " OR ".join(f"{_expr(_json_path((field,)))} = ?" for field in fields)
+        rows = self._query(f"SELECT doc_id FROM {self._table} WHERE {where} ORDER BY doc_id", [value] * len(fields))
+        return [row[0] for row in rows]
+
+    def range_ids(self, field: str, lo: Optional[float] = None, hi: Optional[float] = None,
+                  within: Optional[Iterable[int]] = None) -> List[int]:
+        """doc_ids with ``lo <= key <= hi`` (see ``ensure_key``), in key order."""
+        column = _quote("k_" + field)
+        where, params = [f"{column} IS NOT NULL"], []
+        if lo is not None:
+            where.append(f"{column} >= ?")
+            params.append(lo)
+        if hi is not None:
+            where.append(f"{column} <= ?")
+            params.append(hi)
+        if within is not None:
+            where.append("doc_id IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(list(within)))
+        rows = self._query(
+            f"SELECT doc_id FROM {self._table} WHERE {' AND '.join(where)} ORDER BY {column}, doc_id", params
+        )
+        return [row[0] for row in rows]
+
+    def documents(self, doc_ids: Iterable[int]) -> List[Document]:
+        """Documents by doc_id in one statement, in the given order."""
+        doc_ids = list(doc_ids)
+        rows = self._query(
+            f"SELECT doc_id, doc FROM {self._table} WHERE doc_id IN (SELECT value FROM json_each(?))",
+            (json.dumps(doc_ids),),
+        )
+        found = {doc.doc_id: doc for doc in self._documents(rows)}
+        return [found[doc_id] for doc_id in doc_ids if doc_id in found]
+
+    # --- TinyDB Table API ----------------------------------------------
+
+    def insert(self, document: Mapping) -> int:
+        if not isinstance(document, Mapping):
+            raise ValueError("Document is not a Mapping")
+        doc_id = document.doc_id if isinstance(document, Document) else None
+        with self._storage.transaction():
+            try:
+                cursor = self._execute(self._insert_sql, (doc_id, json.dumps(dict(document)), *self._key_values(document)))
+            except sqlite3.IntegrityError:
+                raise ValueError(f"Document with ID {doc_id} already exists")
+            return cursor.lastrowid
+
+    def insert_multiple(self, documents: Iterable[Mapping]) -> List[int]:
+        with self._storage.transaction():
+            return [self.insert(document) for document in documents]
+
+    def all(self) -> List[Document]:
+        return self._documents(self._query(f"SELECT doc_id, doc FROM {self._table} ORDER BY doc_id"))
+
+    def search(self, cond) -> List[Document]:
+        where = _translate(getattr(cond, "_hash", None))
+        if where is None:
+            docs = self.all()
+        else:
+            docs = self._documents(self._query(
+                f"SELECT doc_id, doc FROM {self._table} WHERE {where[0]} ORDER BY doc_id", where[1]
+            ))
+        return [doc for doc in docs if cond(doc)]
+
+    def get(self, cond=None, doc_id: Optional[int] = None, doc_ids: Optional[List[int]] = None):
+        if doc_id is not None:
+            rows = self._query(f"SELECT doc_id, doc FROM {self._table} WHERE doc_id = ?", (doc_id,))
+            return self._documents(rows)[0] if rows else None
+        if doc_ids is not None:
+            return self.documents(doc_ids)
+        if cond is not None:
+            found = self.search(cond)
+            return found[0] if found else None
+        raise RuntimeError("You have to pass either cond or doc_id or doc_ids")
+
+    def contains(self, cond=None, doc_id: Optional[int] = None) -> bool:
+        if doc_id is not None:
+            return bool(self._query(f"SELECT 1 FROM {self._table} WHERE doc_id = ?", (doc_id,)))
+        if cond is not None:
+            return self.get(cond) is not None
+        raise RuntimeError("You have to pass either cond or doc_id")
+
+    def count(self, cond) -> int:
+        return len(self.search(cond))
+
+    def update(self, fields, cond=None, doc_ids: Optional[Iterable[int]] = None) -> List[int]:
+        with self._storage.transaction():
+            if doc_ids is not None:
+                targets = self.documents(doc_ids)
+            elif cond is not None:
+                targets = self.search(cond)
+            else:
+                targets = self.all()
+            for doc in targets:
+                if callable(fields):
+                    fields(doc)
+                else:
+                    doc.update(fields)
+                self._execute(self._update_sql, (json.dumps(dict(doc)), *self._key_values(doc), doc.doc_id))
+            return [doc.doc_id for doc in targets]
+
+    def remove(self, cond=None, doc_ids: Optional[Iterable[int]] = None) -> List[int]:
+        with self._storage.transaction():
+            if doc_ids is not None:
+                removed = [doc.doc_id for doc in self.documents(doc_ids)]
+            elif cond is not None:
+                removed = [doc.doc_id for doc in self.search(cond)]
+            else:
+                raise RuntimeError("Use truncate() to remove all documents")
+            self._execute(f"DELETE FROM {self._table} WHERE doc_id IN (SELECT value FROM json_each(?))",
+                          (json.dumps(removed),))
+            return removed
+
+    def truncate(self):
+        with self._storage.transaction():
+            self._execute(f"DELETE FROM {self._table}")
+
+    def clear_cache(self):
+        # no query cache: SQLite's page cache plays that role
+        pass
+
+    def __len__(self) -> int:
+        return self._query(f"SELECT COUNT(*) FROM {self._table}")[0][0]
+
+    def __iter__(self):
+        return iter(self.all())
+
+
+class SQLiteDB:
+    """Stands in for the ``TinyDB`` object: ``table(name)``, ``storage``, ``close()``.
+
+    ``indexes`` maps a table name to the fields to index when it is opened.
+    """
+
+    def __init__(self, path: str, indexes: Optional[Mapping[str, Sequence[str]]] = None):
+        self.storage = SQLiteStorage(path)
+        self._indexes = dict(indexes or {})
+        self._tables: Dict[str, SQLiteTable] = {}
+
+    def table(self, name: str) -> SQLiteTable:
+        if name not in self._tables:
+            table = SQLiteTable(self.storage, name)
+            table.ensure_index(*self._indexes.get(name, ()))
+            self._tables[name] = table
+        return self._tables[name]
+
+    def tables(self) -> set:
+        rows = self.storage.connection().execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        return {row[0] for row in rows}
+
+    def close(self):
+        self.storage.close()
+
+
+def migrate(source: str, target: str) -> Dict[str, int]:
+    """Copy every table of a TinyDB JSON file into a SQLite file, keeping doc_ids."""
+    with open(source, encoding="utf-8") as handle:
+        raw = handle.read()
+    data = json.loads(raw) if raw.strip() else {}
+    db = SQLiteDB(target)
+    counts = {}
+    try:
+        with db.storage.transaction():
+            for name, docs in data.items():
+                table = db.table(name)
+                table.truncate()
+                table.insert_multiple(Document(doc, int(doc_id)) for doc_id, doc in docs.items())
+                counts[name] = len(docs)
+    finally:
+        db.close()
+    return counts
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit(f"usage: python -m {__spec__.name if __spec__ else 'sqlite_store'} SOURCE.json TARGET.db")
+    for table_name, total in migrate(sys.argv[1], sys.argv[2]).items():
+        print(f"{table_name}: {total} documents")
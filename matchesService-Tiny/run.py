@@ -1,3 +1,4 @@
 import uvicorn
+from matches_app.config import PORT,WORKERS
 if __name__=='__main__':
- uvicorn.run('matches_app.main:app',host='0.0.0.0',port=8003,reload=True)
+ uvicorn.run('matches_app.main:app',host='0.0.0.0',port=PORT,workers=WORKERS,reload=WORKERS==1)
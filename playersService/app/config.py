@@ -7,6 +7,9 @@ load_dotenv()
 # Basic configuration values (TinyDB-based service)
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*").split(",")
 DB_PATH = os.getenv("DB_PATH", "data/players.json")
+# "json" (TinyDB) or "sqlite" (see sqlite_store.py)
+DB_STORAGE = os.getenv("DB_STORAGE", "sqlite" if DB_PATH.endswith((".db", ".sqlite")) else "json")
+STORAGE_READ_WORKERS = int(os.getenv("STORAGE_READ_WORKERS", "4"))
 SERVICE_NAME = os.getenv("SERVICE_NAME", "playersService - TinyDB")
 
 TEAMS_BASE_URL = os.getenv("TEAMS_BASE_URL", "http://localhost:8001")
@@ -15,6 +18,17 @@ MATCHES_BASE_URL = os.getenv("MATCHES_BASE_URL", "http://localhost:8003")
 API_PREFIX = os.getenv("API_PREFIX", "/api/v1")
 PORT = int(os.getenv("PORT", 8005))
 REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "3.0"))
+# shared HTTP pool for calls to other services; timeouts per dependency
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30.0"))
+TEAMS_TIMEOUT = float(os.getenv("TEAMS_TIMEOUT", REQUEST_TIMEOUT))
+# teams looked up in teamsService are cached (seconds; 404s for less)
+REF_CACHE_TTL = float(os.getenv("REF_CACHE_TTL", "60"))
+REF_CACHE_NEGATIVE_TTL = float(os.getenv("REF_CACHE_NEGATIVE_TTL", "5"))
+REF_CACHE_MAX_SIZE = int(os.getenv("REF_CACHE_MAX_SIZE", "10000"))
+# change notifications from teamsService evict cached entries: redis://... or memory://
+CHANGE_FEED_URL = os.getenv("CHANGE_FEED_URL", "memory://")
 
 
 # Minimal settings object for compatibility with app.main and run.py
@@ -1,8 +1,19 @@
 from tinydb import TinyDB
-from .config import DB_PATH
+from .config import DB_PATH, DB_STORAGE, STORAGE_READ_WORKERS
+from .executor import StorageExecutor
+from .sqlite_store import SQLiteDB
+from .storage import CachedJSONStorage, SharedTable
 
-# TinyDB database (single-file storage)
-db = TinyDB(DB_PATH)
+if DB_STORAGE == "sqlite":
+    # SQLite file with the same documents; players are looked up by doc_id
+    db = SQLiteDB(DB_PATH)
+else:
+    # TinyDB database (single-file storage, parsed once and kept in memory)
+    db = TinyDB(DB_PATH, storage=CachedJSONStorage)
+    db.table_class = SharedTable
+
+# blocking TinyDB calls run here, off the event loop
+db_executor = StorageExecutor(STORAGE_READ_WORKERS)
 
 
 def get_database():
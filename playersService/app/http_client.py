@@ -0,0 +1,98 @@
+"""One pooled ``httpx.AsyncClient`` per service for calls to other services.
+
+Opening a client per request pays for a new connection pool and a TCP
+handshake every time. ``ServiceClient`` is started in the FastAPI lifespan and
+keeps connections alive between requests, within configurable pool limits.
+Each call names the dependency it talks to, which selects its timeout.
+``stats()`` reports how many requests reused a pooled connection and how many
+had to open a new one, using httpcore's request tracing.
+"""
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.config import (
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE,
+    REQUEST_TIMEOUT,
+    TEAMS_TIMEOUT,
+)
+
+
+class ServiceClient:
+    def __init__(self, timeouts: Optional[Dict[str, float]] = None, default_timeout: float = 3.0,
+                 max_connections: int = 100, max_keepalive: int = 20, keepalive_expiry: float = 30.0):
+        self._timeouts = {name: httpx.Timeout(value) for name, value in (timeouts or {}).items()}
+        self._default_timeout = httpx.Timeout(default_timeout)
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self.requests = 0
+        self.opened = 0
+        self.reused = 0
+        self.errors = 0
+
+    async def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(limits=self._limits, timeout=self._default_timeout)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def request(self, dependency: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        if self._client is None:
+            # used outside the lifespan (scripts, plain TestClient): start lazily
+            await self.start()
+        opened = False
+
+        async def trace(event: str, info: Dict[str, Any]):
+            nonlocal opened
+            if event == "connection.connect_tcp.started":
+                opened = True
+
+        self.requests += 1
+        try:
+            response = await self._client.request(
+                method, url,
+                timeout=self._timeouts.get(dependency, self._default_timeout),
+                extensions={"trace": trace},
+                **kwargs,
+            )
+        except httpx.RequestError:
+            self.errors += 1
+            raise
+        finally:
+            if opened:
+                self.opened += 1
+        if not opened:
+            self.reused += 1
+        return response
+
+    async def get(self, dependency: str, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request(dependency, "GET", url, **kwargs)
+
+    async def post(self, dependency: str, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request(dependency, "POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "connectionsOpened": self.opened,
+            "connectionsReused": self.reused,
+            "errors": self.errors,
+        }
+
+
+http_client = ServiceClient(
+    timeouts={"teams": TEAMS_TIMEOUT},
+    default_timeout=REQUEST_TIMEOUT,
+    max_connections=HTTP_MAX_CONNECTIONS,
+    max_keepalive=HTTP_MAX_KEEPALIVE,
+    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+)
@@ -1,18 +1,32 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from app.database import connect_to_mongo, close_mongo_connection
+from app.database import db, db_executor, connect_to_mongo, close_mongo_connection
+from app.change_feed import change_feed
+from app.executor import LoopLagMonitor
+from app.http_client import http_client
+from app.ref_cache import team_cache
 from app.routes import router
 from app.config import settings
 
+loop_lag = LoopLagMonitor()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await connect_to_mongo()
+    loop_lag.start()
+    await http_client.start()
+    change_feed.subscribe("teams", lambda change: team_cache.invalidate(change["id"]), team_cache.clear)
+    await change_feed.start()
     yield
     # Shutdown
+    await change_feed.stop()
+    await http_client.aclose()
+    await loop_lag.stop()
     await close_mongo_connection()
+    db_executor.shutdown()
 
 
 app = FastAPI(
@@ -49,6 +63,12 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def metrics():
+    return {"storage": db.storage.stats(), "executor": db_executor.stats(), "loopLag": loop_lag.stats(), "http": http_client.stats(),
+            "refCache": {"teams": team_cache.stats()}, "changeFeed": change_feed.stats()}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
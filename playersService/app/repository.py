@@ -1,7 +1,7 @@
 from typing import List, Optional
 from datetime import datetime
 from tinydb import Query
-from app.database import get_database
+from app.database import get_database, db_executor
 from app.models import PlayerCreate, PlayerUpdate, PlayerInDB
 import re
 
@@ -18,6 +18,9 @@ class PlayerRepository:
     # CREATE
     # ----------------------------------------------------------
     async def create_player(self, player: PlayerCreate) -> PlayerInDB:
+        return await db_executor.write(self._create_player, player)
+
+    def _create_player(self, player: PlayerCreate) -> PlayerInDB:
         table = self.get_table()
         now = datetime.utcnow().isoformat()
 
@@ -37,6 +40,9 @@ class PlayerRepository:
     # GET by ID
     # ----------------------------------------------------------
     async def get_player(self, player_id: str) -> Optional[PlayerInDB]:
+        return await db_executor.read(self._get_player, player_id)
+
+    def _get_player(self, player_id: str) -> Optional[PlayerInDB]:
         table = self.get_table()
 
         try:
@@ -55,6 +61,9 @@ class PlayerRepository:
     # LIST with pagination
     # ----------------------------------------------------------
     async def get_all_players(self, skip: int = 0, limit: int = 50) -> List[PlayerInDB]:
+        return await db_executor.read(self._get_all_players, skip, limit)
+
+    def _get_all_players(self, skip: int, limit: int) -> List[PlayerInDB]:
         table = self.get_table()
         docs = table.all()
 
@@ -71,6 +80,9 @@ class PlayerRepository:
     # UPDATE
     # ----------------------------------------------------------
     async def update_player(self, player_id: str, updates: PlayerUpdate) -> Optional[PlayerInDB]:
+        return await db_executor.write(self._update_player, player_id, updates)
+
+    def _update_player(self, player_id: str, updates: PlayerUpdate) -> Optional[PlayerInDB]:
         table = self.get_table()
 
         try:
@@ -95,6 +107,9 @@ class PlayerRepository:
     # DELETE
     # ----------------------------------------------------------
     async def delete_player(self, player_id: str) -> bool:
+        return await db_executor.write(self._delete_player, player_id)
+
+    def _delete_player(self, player_id: str) -> bool:
         table = self.get_table()
 
         try:
@@ -109,6 +124,9 @@ class PlayerRepository:
     # SEARCH
     # ----------------------------------------------------------
     async def search_players(self, query: str) -> List[PlayerInDB]:
+        return await db_executor.read(self._search_players, query)
+
+    def _search_players(self, query: str) -> List[PlayerInDB]:
         table = self.get_table()
         docs = table.all()
         pattern = re.compile(query, re.IGNORECASE)
@@ -4,7 +4,9 @@ import httpx
 
 from app.models import PlayerCreate, PlayerUpdate, PlayerResponse
 from app.repository import player_repository
-from app.config import TEAMS_BASE_URL, REQUEST_TIMEOUT
+from app.config import TEAMS_BASE_URL
+from app.http_client import http_client
+from app.ref_cache import team_cache
 
 router = APIRouter(prefix="/api/v1/players", tags=["players"])
 
@@ -12,14 +14,24 @@ router = APIRouter(prefix="/api/v1/players", tags=["players"])
 # ----------------------------------------------------------
 # 🧩 Validação externa: verifica se o time existe
 # ----------------------------------------------------------
+async def _load_team(team_id: str):
+    r = await http_client.get("teams", f"{TEAMS_BASE_URL}/api/v1/teams/{team_id}")
+    if r.status_code == 404:
+        return None
+    r.raise_for_status()
+    return r.json()
+
+
 async def validate_team_exists(team_id: str):
     if not team_id:
         return
 
-    async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT) as client:
-        r = await client.get(f"{TEAMS_BASE_URL}/api/v1/teams/{team_id}")
+    try:
+        team = await team_cache.get(team_id, lambda: _load_team(team_id))
+    except httpx.HTTPStatusError:
+        team = None
 
-    if r.status_code != 200:
+    if team is None:
         raise HTTPException(
             status_code=400,
             detail=f"Team '{team_id}' does not exist in teamsService."
@@ -0,0 +1,143 @@
+"""Change notifications for reference data (teams, competitions).
+
+teamsService and competitionsService publish ``{"op": "created" | "updated"
+| "deleted", "id": ...}`` on the ``<kind>.changes`` channel after each write.
+Services that cache those documents (ref_cache.py) subscribe and evict the
+entry, so the cache TTL can be long without serving an edited document.
+
+``CHANGE_FEED_URL`` selects the transport: ``redis://...`` uses Redis Pub/Sub
+and reaches every process; ``memory://`` (the default) is an in-process
+stand-in that only reaches subscribers in the same process. A failed publish
+never fails the write that caused it; it is counted in ``stats()``. When the
+Redis subscription drops, subscribers are reset (their whole cache is
+dropped) because notifications may have been missed in the meantime.
+"""
+import asyncio
+import json
+from typing import Callable, Dict, List, Optional
+
+from app.config import CHANGE_FEED_URL
+
+_RETRY_SECONDS = 1.0
+# a Redis that is down must not hold up the write that publishes
+_PUBLISH_TIMEOUT = 1.0
+
+# memory:// subscribers of this process, by channel
+_local: Dict[str, List["ChangeFeed"]] = {}
+
+
+class ChangeFeed:
+    def __init__(self, url: str = "memory://"):
+        self._url = url
+        self._redis = None
+        self._handlers: Dict[str, Callable[[dict], None]] = {}
+        self._resets: Dict[str, Callable[[], None]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.published = 0
+        self.publish_errors = 0
+        self.received = 0
+        self.resets = 0
+
+    @property
+    def _is_redis(self) -> bool:
+        return self._url.startswith(("redis://", "rediss://", "unix://"))
+
+    def subscribe(self, kind: str, on_change: Callable[[dict], None], on_reset: Optional[Callable[[], None]] = None):
+        """Call ``on_change(message)`` for every change of ``kind``; register before ``start()``."""
+        self._handlers[f"{kind}.changes"] = on_change
+        if on_reset:
+            self._resets[kind] = on_reset
+
+    async def start(self):
+        if self._is_redis:
+            from redis.asyncio import Redis
+
+            self._redis = Redis.from_url(self._url, decode_responses=True, socket_connect_timeout=_PUBLISH_TIMEOUT)
+            if self._handlers and self._task is None:
+                self._task = asyncio.create_task(self._listen())
+        else:
+            for channel in self._handlers:
+                _local.setdefault(channel, []).append(self)
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for subscribers in _local.values():
+            if self in subscribers:
+                subscribers.remove(self)
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def publish(self, kind: str, op: str, doc_id: str):
+        channel = f"{kind}.changes"
+        message = {"op": op, "id": doc_id}
+        try:
+            if self._is_redis:
+                if self._redis is None:
+                    await self.start()
+                await asyncio.wait_for(self._redis.publish(channel, json.dumps(message)), _PUBLISH_TIMEOUT)
+            else:
+                for subscriber in list(_local.get(channel, ())):
+                    subscriber._deliver(channel, message)
+            self.published += 1
+        except Exception:
+            self.publish_errors += 1
+
+    def _deliver(self, channel: str, message: dict):
+        handler = self._handlers.get(channel)
+        if handler:
+            self.received += 1
+            handler(message)
+
+    def _reset(self):
+        self.resets += 1
+        for reset in self._resets.values():
+            reset()
+
+    async def _listen(self):
+        connected = True
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(*self._handlers)
+                if not connected:
+                    # changes published while we were away are lost
+                    self._reset()
+                    connected = True
+                async for msg in pubsub.listen():
+                    if msg["type"] != "message":
+                        continue
+                    try:
+                        message = json.loads(msg["data"])
+                    except ValueError:
+                        continue
+                    self._deliver(msg["channel"], message)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                if connected:
+                    self._reset()
+                connected = False
+                await asyncio.sleep(_RETRY_SECONDS)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "published": self.published,
+            "publishErrors": self.publish_errors,
+            "received": self.received,
+            "resets": self.resets,
+        }
+
+
+change_feed = ChangeFeed(CHANGE_FEED_URL)
@@ -5,6 +5,9 @@ load_dotenv()
 
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:3000").split(",")
 DB_PATH = os.getenv("DB_PATH", "data/profiles.json")
+# "json" (TinyDB) or "sqlite" (see sqlite_store.py)
+DB_STORAGE = os.getenv("DB_STORAGE", "sqlite" if DB_PATH.endswith((".db", ".sqlite")) else "json")
+STORAGE_READ_WORKERS = int(os.getenv("STORAGE_READ_WORKERS", "4"))
 SERVICE_NAME = os.getenv("SERVICE_NAME", "profileService - TinyDB")
 
 TEAMS_BASE_URL = os.getenv("TEAMS_BASE_URL", "http://localhost:8001")
@@ -12,3 +15,17 @@ COMPETITIONS_BASE_URL = os.getenv("COMPETITIONS_BASE_URL", "http://localhost:800
 
 PORT = int(os.getenv("PORT", 8000))
 REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "3.0"))
+# shared HTTP pool for calls to other services; timeouts per dependency
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30.0"))
+TEAMS_TIMEOUT = float(os.getenv("TEAMS_TIMEOUT", REQUEST_TIMEOUT))
+COMPETITIONS_TIMEOUT = float(os.getenv("COMPETITIONS_TIMEOUT", REQUEST_TIMEOUT))
+# favorites are validated concurrently, at most this many calls at a time
+VALIDATION_CONCURRENCY = int(os.getenv("VALIDATION_CONCURRENCY", "16"))
+# teams/competitions looked up in other services are cached (seconds; 404s for less)
+REF_CACHE_TTL = float(os.getenv("REF_CACHE_TTL", "60"))
+REF_CACHE_NEGATIVE_TTL = float(os.getenv("REF_CACHE_NEGATIVE_TTL", "5"))
+REF_CACHE_MAX_SIZE = int(os.getenv("REF_CACHE_MAX_SIZE", "10000"))
+# change notifications from teams/competitions evict cached entries: redis://... or memory://
+CHANGE_FEED_URL = os.getenv("CHANGE_FEED_URL", "memory://")
@@ -1,5 +1,13 @@
 from tinydb import TinyDB
-from app.config import DB_PATH
+from app.config import DB_PATH, DB_STORAGE, STORAGE_READ_WORKERS
+from app.executor import StorageExecutor
+from app.sqlite_store import SQLiteDB
+from app.storage import CachedJSONStorage, SharedTable
 
-db = TinyDB(DB_PATH)
+if DB_STORAGE == "sqlite":
+    db = SQLiteDB(DB_PATH, indexes={"profiles": ("user_id",)})
+else:
+    db = TinyDB(DB_PATH, storage=CachedJSONStorage)
+    db.table_class = SharedTable
+db_executor = StorageExecutor(STORAGE_READ_WORKERS)
 profiles_table = db.table("profiles")
@@ -1,24 +1,62 @@
+import asyncio
+
 from fastapi import APIRouter, HTTPException, status
 from typing import Optional
 import httpx
 
 from app.models import Profile
 from app.repository import ProfileRepository
-from app.config import TEAMS_BASE_URL, COMPETITIONS_BASE_URL, REQUEST_TIMEOUT
+from app.config import TEAMS_BASE_URL, COMPETITIONS_BASE_URL, VALIDATION_CONCURRENCY
+from app.database import db_executor
+from app.http_client import http_client
+from app.ref_cache import competition_cache, team_cache
 
 router = APIRouter()
 repo = ProfileRepository()
 
+# máximo de IDs por chamada :batchGet (limite dos teams/competitionsService)
+BATCH_GET_LIMIT = 500
+
 
 @router.get("/")
 async def root():
     return {"service": "profileService", "status": "ok"}
 
 
+async def _load_team(team_id: str):
+    r = await http_client.get("teams", f"{TEAMS_BASE_URL}/api/v1/teams/{team_id}")
+    if r.status_code == 404:
+        return None
+    r.raise_for_status()
+    return r.json()
+
+
+async def _load_competition(competition_id: str):
+    r = await http_client.get("competitions", f"{COMPETITIONS_BASE_URL}/api/v1/competitions/{competition_id}")
+    if r.status_code == 404:
+        return None
+    r.raise_for_status()
+    return r.json()
+
+
+async def _load_teams(team_ids: list):
+    r = await http_client.post("teams", f"{TEAMS_BASE_URL}/api/v1/teams:batchGet", json={"ids": team_ids})
+    r.raise_for_status()
+    return {team["id"]: team for team in r.json()["data"]}
+
+
+async def _load_competitions(competition_ids: list):
+    r = await http_client.post("competitions", f"{COMPETITIONS_BASE_URL}/api/v1/competitions:batchGet", json={"ids": competition_ids})
+    r.raise_for_status()
+    return {comp["id"]: comp for comp in r.json()["data"]}
+
+
 async def _check_team_exists(team_id: str):
-    async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT) as client:
-        r = await client.get(f"{TEAMS_BASE_URL}/api/v1/teams/{team_id}")
-    if r.status_code != 200:
+    try:
+        team = await team_cache.get(team_id, lambda: _load_team(team_id))
+    except httpx.HTTPStatusError:
+        team = None
+    if team is None:
         raise HTTPException(
             status_code=400,
             detail=f"Favorite team '{team_id}' not found"
@@ -26,23 +64,70 @@ async def _check_team_exists(team_id: str):
 
 
 async def _check_competition_exists(competition_id: str):
-    async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT) as client:
-        r = await client.get(f"{COMPETITIONS_BASE_URL}/api/v1/competitions/{competition_id}")
-    if r.status_code != 200:
+    try:
+        competition = await competition_cache.get(competition_id, lambda: _load_competition(competition_id))
+    except httpx.HTTPStatusError:
+        competition = None
+    if competition is None:
         raise HTTPException(
             status_code=400,
             detail=f"Favorite competition '{competition_id}' not found"
         )
 
 
-async def _validate_profile_references(profile: Profile):
+async def _check_teams_exist(team_ids: list):
+    teams = await team_cache.get_many(team_ids, _load_teams)
+    missing = [team_id for team_id in team_ids if teams[team_id] is None]
+    if missing:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Favorite team '{missing[0]}' not found"
+        )
+
+
+async def _check_competitions_exist(competition_ids: list):
+    comps = await competition_cache.get_many(competition_ids, _load_competitions)
+    missing = [comp_id for comp_id in competition_ids if comps[comp_id] is None]
+    if missing:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Favorite competition '{missing[0]}' not found"
+        )
+
+
+async def _check_all(checks, limit: int = VALIDATION_CONCURRENCY):
+    """Await the reference checks concurrently, at most ``limit`` at a time.
+
+    The first check that fails (missing reference or unreachable service)
+    is raised at once and the remaining ones are cancelled.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(check):
+        try:
+            async with semaphore:
+                await check
+        finally:
+            check.close()  # cancelled while queued: never started
+
+    tasks = [asyncio.ensure_future(bounded(check)) for check in checks]
     try:
-        for team_id in profile.favorite_teams:
-            await _check_team_exists(team_id)
+        for done in asyncio.as_completed(tasks):
+            await done
+    finally:
+        for task in tasks:
+            task.cancel()
 
-        for comp_id in profile.favorite_competitions:
-            await _check_competition_exists(comp_id)
-    except httpx.RequestError:
+
+async def _validate_profile_references(profile: Profile):
+    # uma chamada :batchGet por serviço (um favorito repetido vai uma vez só)
+    teams = list(dict.fromkeys(profile.favorite_teams))
+    comps = list(dict.fromkeys(profile.favorite_competitions))
+    checks = [_check_teams_exist(teams[i:i + BATCH_GET_LIMIT]) for i in range(0, len(teams), BATCH_GET_LIMIT)]
+    checks += [_check_competitions_exist(comps[i:i + BATCH_GET_LIMIT]) for i in range(0, len(comps), BATCH_GET_LIMIT)]
+    try:
+        await _check_all(checks)
+    except (httpx.RequestError, httpx.HTTPStatusError):
         raise HTTPException(
             status_code=503,
             detail="Dependency service unavailable (teamsService or competitionsService)"
@@ -55,7 +140,7 @@ async def create_profile(profile: Profile):
     await _validate_profile_references(profile)
 
     try:
-        return repo.create(profile)
+        return await db_executor.write(repo.create, profile)
     except ValueError as e:
         # ex: profile com user_id já existe
         raise HTTPException(status_code=409, detail=str(e))
@@ -63,7 +148,7 @@ async def create_profile(profile: Profile):
 
 @router.get("/api/profiles/{user_id}")
 async def get_profile(user_id: str):
-    doc = repo.get_by_user_id(user_id)
+    doc = await db_executor.read(repo.get_by_user_id, user_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Profile not found")
     return doc
@@ -76,7 +161,7 @@ async def update_profile(user_id: str, profile: Profile):
 
     await _validate_profile_references(profile)
 
-    updated = repo.update(user_id, profile.model_dump(mode="json"))
+    updated = await db_executor.write(repo.update, user_id, profile.model_dump(mode="json"))
     if not updated:
         raise HTTPException(status_code=404, detail="Profile not found")
     return updated
@@ -84,7 +169,7 @@ async def update_profile(user_id: str, profile: Profile):
 
 @router.get("/api/profiles/{user_id}/favorites")
 async def list_favorites(user_id: str):
-    doc = repo.get_by_user_id(user_id)
+    doc = await db_executor.read(repo.get_by_user_id, user_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Profile not found")
     return {
@@ -96,7 +181,7 @@ async def list_favorites(user_id: str):
 @router.post("/api/profiles/{user_id}/favorites/teams/{team_id}")
 async def add_fav_team(user_id: str, team_id: str):
     await _check_team_exists(team_id)
-    doc = repo.add_favorite(user_id, "favorite_teams", team_id)
+    doc = await db_executor.write(repo.add_favorite, user_id, "favorite_teams", team_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Profile not found")
     return doc
@@ -104,7 +189,7 @@ async def add_fav_team(user_id: str, team_id: str):
 
 @router.delete("/api/profiles/{user_id}/favorites/teams/{team_id}")
 async def remove_fav_team(user_id: str, team_id: str):
-    doc = repo.remove_favorite(user_id, "favorite_teams", team_id)
+    doc = await db_executor.write(repo.remove_favorite, user_id, "favorite_teams", team_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Profile not found")
     return doc
@@ -113,7 +198,7 @@ async def remove_fav_team(user_id: str, team_id: str):
 @router.post("/api/profiles/{user_id}/favorites/competitions/{competition_id}")
 async def add_fav_comp(user_id: str, competition_id: str):
     await _check_competition_exists(competition_id)
-    doc = repo.add_favorite(user_id, "favorite_competitions", competition_id)
+    doc = await db_executor.write(repo.add_favorite, user_id, "favorite_competitions", competition_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Profile not found")
     return doc
@@ -121,7 +206,7 @@ async def add_fav_comp(user_id: str, competition_id: str):
 
 @router.delete("/api/profiles/{user_id}/favorites/competitions/{competition_id}")
 async def remove_fav_comp(user_id: str, competition_id: str):
-    doc = repo.remove_favorite(user_id, "favorite_competitions", competition_id)
+    doc = await db_executor.write(repo.remove_favorite, user_id, "favorite_competitions", competition_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Profile not found")
     return doc
@@ -0,0 +1,197 @@
+"""TinyDB storage that keeps the parsed JSON document in memory.
+
+TinyDB's default ``JSONStorage`` re-reads and re-parses the whole file on every
+``search``/``get``/``all``. ``CachedJSONStorage`` parses the file once, serves
+reads from memory and writes every change through to disk. If the file is
+modified by someone else (mtime/size/inode changed) the next read reloads it.
+
+Several processes (uvicorn workers) may share one file: writes happen inside
+``CachedJSONStorage.transaction()``, an exclusive lock on ``<path>.lock`` that
+first reloads whatever other processes committed, and reloads take the same
+lock in shared mode so they never see a half-written file.
+
+Reads may come from several threads at once (see executor.py), so the cache
+and TinyDB's per-table query cache (``SharedTable``) are guarded by locks.
+"""
+import os
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Optional
+
+from tinydb.storages import JSONStorage
+from tinydb.table import Table
+from tinydb.utils import LRUCache
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+_EMPTY = object()
+
+
+class _FileLock:
+    """Inter-process lock on a sidecar file (flock, or msvcrt on Windows)."""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._pid = os.getpid()
+        self._handle = open(path, "a+")
+
+    def acquire(self, shared: bool = False):
+        if self._pid != os.getpid():
+            # forked after opening (e.g. gunicorn --preload): flock is shared
+            # with the parent's file description, so take our own
+            self._pid = os.getpid()
+            self._handle = open(self._path, "a+")
+        if fcntl:
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            self._handle.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._handle.fileno(), msvcrt.LK_LOCK, 1)
+                    return
+                except OSError:
+                    continue
+
+    def release(self):
+        if fcntl:
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+        else:
+            self._handle.seek(0)
+            msvcrt.locking(self._handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def close(self):
+        self._handle.close()
+
+
+class _LockedLRUCache(LRUCache):
+    def __init__(self, capacity=None):
+        super().__init__(capacity)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            return super().get(key, default)
+
+    def set(self, key, value):
+        with self._lock:
+            super().set(key, value)
+
+    def clear(self):
+        with self._lock:
+            super().clear()
+
+
+class SharedTable(Table):
+    """TinyDB table that is safe to share between threads and processes.
+
+    The query cache is locked, and it is dropped (together with the cached next
+    doc_id) whenever the storage reloaded changes made by another process.
+    Inserts and updates run inside the storage transaction, so the
+    read-modify-write TinyDB does is atomic across processes.
+    """
+
+    query_cache_class = _LockedLRUCache
+    _seen_reloads = None
+
+    def _transaction(self):
+        transaction = getattr(self._storage, "transaction", None)
+        return transaction() if transaction else nullcontext()
+
+    def _refresh(self):
+        self._storage.read()
+        reloads = getattr(self._storage, "reloads", 0)
+        if reloads != self._seen_reloads:
+            self._seen_reloads = reloads
+            self.clear_cache()
+            self._next_id = None
+
+    def insert(self, document):
+        with self._transaction():
+            self._refresh()
+            return super().insert(document)
+
+    def insert_multiple(self, documents):
+        with self._transaction():
+            self._refresh()
+            return super().insert_multiple(documents)
+
+    def _update_table(self, updater):
+        with self._transaction():
+            self._refresh()
+            super()._update_table(updater)
+
+    def search(self, cond):
+        self._refresh()
+        return super().search(cond)
+
+
+class CachedJSONStorage(JSONStorage):
+    def __init__(self, path: str, **kwargs):
+        super().__init__(path, **kwargs)
+        self._path = path
+        self._data: Any = _EMPTY
+        self._stamp = None
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self._lock = threading.RLock()
+        self._file_lock = _FileLock(path + ".lock")
+        self._tx_depth = 0
+        self.read()
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self._path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    @contextmanager
+    def transaction(self):
+        """Hold the exclusive file lock; re-entrant within the owning thread."""
+        with self._lock:
+            if not self._tx_depth:
+                self._file_lock.acquire()
+            self._tx_depth += 1
+            try:
+                yield self
+            finally:
+                self._tx_depth -= 1
+                if not self._tx_depth:
+                    self._file_lock.release()
+
+    def read(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        with self._lock:
+            stamp = self._file_stamp()
+            if self._data is not _EMPTY and stamp == self._stamp:
+                self.hits += 1
+                return self._data
+            if self._data is not _EMPTY:
+                self.reloads += 1
+            self.misses += 1
+            if not self._tx_depth:
+                self._file_lock.acquire(shared=True)
+            try:
+                self._stamp = self._file_stamp()
+                self._data = super().read()
+            finally:
+                if not self._tx_depth:
+                    self._file_lock.release()
+            return self._data
+
+    def write(self, data: Dict[str, Dict[str, Any]]):
+        with self.transaction():
+            super().write(data)
+            self._data = data
+            self._stamp = self._file_stamp()
+
+    def close(self):
+        super().close()
+        self._file_lock.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "reloads": self.reloads}
@@ -1,3 +1,5 @@
 import uvicorn
+from teams_app.config import PORT, WORKERS
+
 if __name__ == "__main__":
-    uvicorn.run("teams_app.main:app", host="0.0.0.0", port=8001, reload=True)
+    uvicorn.run("teams_app.main:app", host="0.0.0.0", port=PORT, workers=WORKERS, reload=WORKERS == 1)
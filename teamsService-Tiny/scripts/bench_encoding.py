@@ -0,0 +1,55 @@
+"""to_jsonable vs. the json.dumps/json.loads round-trip it replaced.
+
+    python scripts/bench_encoding.py [--number 20000]
+
+The document is match-sized and holds the kinds of values repositories
+store: nested dicts and lists, datetimes, an HttpUrl, a str Enum, a tuple,
+a UUID and a non-string key. Both outputs are checked equal first.
+"""
+import argparse
+import enum
+import json
+import os
+import sys
+import timeit
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from pydantic import HttpUrl
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from teams_app.encoding import to_jsonable  # noqa: E402
+
+
+class Status(str, enum.Enum):
+    SCHEDULED = "SCHEDULED"
+
+
+def round_trip(doc):
+    return json.loads(json.dumps(doc, default=str, ensure_ascii=False))
+
+
+def sample():
+    now = datetime.now(timezone.utc)
+    return {
+        "id": "MATCH_X", "competitionId": "C1", "homeTeamId": "T1", "awayTeamId": "T2", "sport": "futebol",
+        "scheduledAt": now, "createdAt": now.isoformat(), "status": Status.SCHEDULED,
+        "venue": {"name": "Ginásio", "city": "São Paulo"}, "score": {"home": 0, "away": 0},
+        "meta": {"assist": "P1", "values": [1, 2.5, None, True]},
+        "logo": HttpUrl("http://example.com/logo.png"), "period": (1, 2), 1: "numeric key", "ref": uuid4(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+    doc = sample()
+    assert to_jsonable(doc) == round_trip(doc)
+    for name, encode in (("json round-trip", round_trip), ("to_jsonable", to_jsonable)):
+        seconds = timeit.timeit(lambda: encode(doc), number=args.number)
+        print(f"{name:16} {seconds / args.number * 1e6:6.1f} us/doc")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""IdIndex lookup vs. a Query().id scan, from 1k to 1M documents.
+
+    python scripts/bench_index.py [--sizes 1000 10000 ...] [--lookups 2000]
+
+Runs against MemoryStorage, so only the lookup is measured (no file I/O).
+The scan clears TinyDB's query cache before each search, as a new id would.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+from tinydb import Query, TinyDB
+from tinydb.storages import MemoryStorage
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from teams_app.index import IdIndex  # noqa: E402
+
+SCANS = 5
+
+
+def bench(size: int, lookups: int):
+    table = TinyDB(storage=MemoryStorage).table("teams")
+    table.insert_multiple({"id": f"T{i}", "name": f"Team {i}"} for i in range(size))
+    index = IdIndex(table)
+    keys = [f"T{random.randrange(size)}" for _ in range(lookups)]
+
+    started = time.perf_counter()
+    for key in keys:
+        assert index.get(key)["id"] == key
+    indexed = (time.perf_counter() - started) / lookups
+
+    started = time.perf_counter()
+    for key in keys[:SCANS]:
+        table.clear_cache()
+        table.search(Query().id == key)
+    scanned = (time.perf_counter() - started) / SCANS
+    return indexed, scanned
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+    random.seed(0)
+    print(f"{'docs':>10}  {'IdIndex.get':>12}  {'Query().id scan':>16}")
+    for size in args.sizes:
+        indexed, scanned = bench(size, args.lookups)
+        print(f"{size:>10,}  {indexed * 1e6:9.1f} us  {scanned * 1e3:13.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
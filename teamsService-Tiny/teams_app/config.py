@@ -9,6 +9,9 @@ CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost
 
 # 📦 Banco
 DB_PATH = os.getenv("DB_PATH", "data/teams.json")
+# "json" (TinyDB) or "sqlite" (see sqlite_store.py)
+DB_STORAGE = os.getenv("DB_STORAGE", "sqlite" if DB_PATH.endswith((".db", ".sqlite")) else "json")
+STORAGE_READ_WORKERS = int(os.getenv("STORAGE_READ_WORKERS", "4"))
 
 # 🧱 Identificação do serviço
 SERVICE_NAME = os.getenv("SERVICE_NAME", "teamsService - TinyDB")
@@ -22,5 +25,22 @@ COMPETITIONS_BASE_URL = os.getenv("COMPETITIONS_BASE_URL", "http://localhost:800
 # 🔌 Porta
 PORT = int(os.getenv("PORT", 8001))
 
+# 🧵 Processos uvicorn (>1 desliga o reload; o TinyDB é protegido por lock de arquivo)
+WORKERS = int(os.getenv("WORKERS", "1"))
+
 # Config extra opcional
 REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "3.0"))
+
+# 🔗 Pool HTTP compartilhado com os outros micros (timeout por dependência)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30.0"))
+COMPETITIONS_TIMEOUT = float(os.getenv("COMPETITIONS_TIMEOUT", REQUEST_TIMEOUT))
+
+# 🗃️ Cache das competições consultadas (segundos; 404 fica menos tempo)
+REF_CACHE_TTL = float(os.getenv("REF_CACHE_TTL", "60"))
+REF_CACHE_NEGATIVE_TTL = float(os.getenv("REF_CACHE_NEGATIVE_TTL", "5"))
+REF_CACHE_MAX_SIZE = int(os.getenv("REF_CACHE_MAX_SIZE", "10000"))
+
+# 📣 Avisos de alteração (times publicados, competições assinadas): redis://... ou memory://
+CHANGE_FEED_URL = os.getenv("CHANGE_FEED_URL", "memory://")
@@ -1,5 +1,13 @@
 from tinydb import TinyDB
-from .config import DB_PATH
+from .config import DB_PATH, DB_STORAGE, STORAGE_READ_WORKERS
+from .executor import StorageExecutor
+from .sqlite_store import SQLiteDB
+from .storage import CachedJSONStorage, SharedTable
 
-db = TinyDB(DB_PATH)
+if DB_STORAGE == "sqlite":
+    db = SQLiteDB(DB_PATH, indexes={"teams": ("name",)})
+else:
+    db = TinyDB(DB_PATH, storage=CachedJSONStorage)
+    db.table_class = SharedTable
+db_executor = StorageExecutor(STORAGE_READ_WORKERS)
 teams_table = db.table("teams")
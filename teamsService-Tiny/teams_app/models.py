@@ -15,3 +15,7 @@ class TeamIn(BaseModel):
 class TeamOut(TeamIn):
     id: str
     createdAt: str
+
+
+class BatchGetIn(BaseModel):
+    ids: List[str] = Field(..., max_length=500, description="Team IDs to fetch")
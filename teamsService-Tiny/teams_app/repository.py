@@ -1,34 +1,56 @@
-from typing import Optional, Dict, Any
-import json
+from typing import Optional, Dict, Any, List
 from tinydb import Query
 from .database import teams_table
+from .encoding import to_jsonable
+from .index import IdIndex
 
 class TeamsRepository:
     def __init__(self):
         self.table = teams_table
+        self._by_id = IdIndex(self.table)
 
     def insert(self, doc: Dict[str, Any]) -> Dict[str, Any]:
         # TinyDB uses json.dumps under the hood which fails on non-serializable
         # types (e.g. pydantic Url objects, datetimes). Convert the document to
-        # a JSON-serializable structure by round-tripping through json with
-        # default=str so those objects become strings.
-        serializable = json.loads(json.dumps(doc, default=str, ensure_ascii=False))
-        self.table.insert(serializable)
+        # a JSON-serializable structure so those objects become strings.
+        serializable = to_jsonable(doc)
+        doc_id = self.table.insert(serializable)
+        self._by_id.add(serializable.get("id"), doc_id)
         return serializable
 
     def get(self, team_id: str) -> Optional[Dict[str, Any]]:
-        res = self.table.search(Query().id == team_id)
-        return res[0] if res else None
+        return self._by_id.get(team_id)
+
+    def get_many(self, team_ids: List[str]) -> Dict[str, List[Any]]:
+        found, missing = [], []
+        for team_id in dict.fromkeys(team_ids):
+            doc = self._by_id.get(team_id)
+            if doc:
+                found.append(doc)
+            else:
+                missing.append(team_id)
+        return {"found": found, "missing": missing}
 
     def update(self, team_id: str, patch: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        if not self.get(team_id):
-            return None
-        serializable_patch = json.loads(json.dumps(patch, default=str, ensure_ascii=False))
-        self.table.update(serializable_patch, Query().id == team_id)
-        return self.get(team_id)
+        with self.table.storage.transaction():
+            doc_id = self._by_id.doc_id(team_id)
+            if doc_id is None:
+                return None
+            serializable_patch = to_jsonable(patch)
+            self.table.update(serializable_patch, doc_ids=[doc_id])
+            new_id = serializable_patch.get("id", team_id)
+            if new_id != team_id:
+                self._by_id.discard(team_id)
+                self._by_id.add(new_id, doc_id)
+            return self.table.get(doc_id=doc_id)
 
     def remove(self, team_id: str) -> bool:
-        return bool(self.table.remove(Query().id == team_id))
+        with self.table.storage.transaction():
+            doc_id = self._by_id.doc_id(team_id)
+            if doc_id is None:
+                return False
+            self._by_id.discard(team_id)
+            return bool(self.table.remove(doc_ids=[doc_id]))
 
     def list(self, filters: Dict[str, Any], q: Optional[str], limit: int, offset: int):
         items = self.table.all()
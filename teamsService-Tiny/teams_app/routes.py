@@ -1,12 +1,17 @@
-import httpx
 from fastapi import APIRouter, HTTPException, Query, status
 from typing import Optional
 from uuid import uuid4
 from datetime import datetime, timezone
 
-from .models import TeamIn, TeamOut
+import httpx
+
+from .models import BatchGetIn, TeamIn, TeamOut
 from .repository import TeamsRepository
 from .config import COMPETITIONS_BASE_URL
+from .database import db_executor
+from .change_feed import change_feed
+from .http_client import http_client
+from .ref_cache import competition_cache
 
 router = APIRouter()
 repo = TeamsRepository()
@@ -21,15 +26,25 @@ VALID_UNIVERSITIES = [
     "sao_judas", "uninove", "senac", "etec", "anhanguera"
 ]
 
+async def _load_competition(competition_id: str):
+    r = await http_client.get("competitions", f"{COMPETITIONS_BASE_URL}/api/v1/competitions/{competition_id}")
+    if r.status_code == 404:
+        return None
+    r.raise_for_status()
+    return r.json()
+
+
 async def fetch_competition(competition_id: str):
-    async with httpx.AsyncClient(timeout=3.0) as client:
-        r = await client.get(f"{COMPETITIONS_BASE_URL}/api/v1/competitions/{competition_id}")
-        if r.status_code != 200:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Competition '{competition_id}' not found"
-            )
-        return r.json()
+    try:
+        competition = await competition_cache.get(competition_id, lambda: _load_competition(competition_id))
+    except httpx.HTTPStatusError:
+        competition = None
+    if competition is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Competition '{competition_id}' not found"
+        )
+    return competition
 
 
 @router.get("/", summary="Service info")
@@ -65,7 +80,7 @@ async def create_team(team: TeamIn):
         )
 
     # 5. Validar nome único dentro da universidade
-    existing = repo.find_by_name_and_university(team.name, team.university)
+    existing = await db_executor.read(repo.find_by_name_and_university, team.name, team.university)
     if existing:
         raise HTTPException(
             status_code=409,
@@ -77,7 +92,9 @@ async def create_team(team: TeamIn):
     doc["id"] = f"TEAM_{uuid4().hex[:8].upper()}"
     doc["createdAt"] = datetime.now(timezone.utc).isoformat()
 
-    return repo.insert(doc)
+    created = await db_executor.write(repo.insert, doc)
+    await change_feed.publish("teams", "created", created["id"])
+    return created
 
 
 @router.get("/api/v1/teams")
@@ -90,7 +107,7 @@ async def list_teams(
     offset: int = 0,
 ):
     filters = {"university": university, "sport": sport, "competitionId": competitionId}
-    res = repo.list(filters, q, limit, offset)
+    res = await db_executor.read(repo.list, filters, q, limit, offset)
     return {
         "data": res["items"],
         "meta": {
@@ -102,9 +119,15 @@ async def list_teams(
     }
 
 
+@router.post("/api/v1/teams:batchGet", summary="Fetch several teams by ID")
+async def batch_get_teams(body: BatchGetIn):
+    res = await db_executor.read(repo.get_many, body.ids)
+    return {"data": res["found"], "missing": res["missing"]}
+
+
 @router.get("/api/v1/teams/{team_id}", response_model=TeamOut)
 async def get_team(team_id: str):
-    doc = repo.get(team_id)
+    doc = await db_executor.read(repo.get, team_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Team not found")
     return doc
@@ -125,16 +148,18 @@ async def update_team(team_id: str, team: TeamIn):
     patch = team.model_dump()
     patch["id"] = team_id
 
-    updated = repo.update(team_id, patch)
+    updated = await db_executor.write(repo.update, team_id, patch)
     if not updated:
         raise HTTPException(status_code=404, detail="Team not found")
 
+    await change_feed.publish("teams", "updated", team_id)
     return updated
 
 
 @router.delete("/api/v1/teams/{team_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_team(team_id: str):
-    ok = repo.remove(team_id)
+    ok = await db_executor.write(repo.remove, team_id)
     if not ok:
         raise HTTPException(status_code=404, detail="Team not found")
+    await change_feed.publish("teams", "deleted", team_id)
     return
@@ -0,0 +1,52 @@
+"""to_jsonable against the json.dumps(default=str) round-trip it replaced."""
+import json
+import uuid
+from datetime import datetime
+
+from pydantic import BaseModel
+
+from teams_app.encoding import to_jsonable
+
+
+def _round_trip(value):
+    return json.loads(json.dumps(value, default=str))
+
+
+class Player(BaseModel):
+    name: str
+    born: datetime
+
+
+def test_matches_round_trip_for_plain_documents():
+    doc = {
+        "name": "Uscore",
+        "founded": datetime(1902, 3, 8),
+        "id": uuid.UUID(int=7),
+        "tags": ("a", "b"),
+        "squad": [{"n": 1, "rating": 7.5, "active": True, "coach": None}],
+        1: "int key",
+        None: "null key",
+    }
+    assert to_jsonable(doc) == _round_trip(doc)
+
+
+def test_result_is_a_deep_copy():
+    doc = {"squad": [{"n": 1}]}
+    result = to_jsonable(doc)
+    result["squad"][0]["n"] = 2
+    assert doc == {"squad": [{"n": 1}]}
+
+
+def test_sets_become_lists():
+    assert to_jsonable({"ids": {3}}) == {"ids": [3]}
+    assert sorted(to_jsonable(frozenset({"a", "b"}))) == ["a", "b"]
+    # the round-trip stored the set's str() instead
+    assert _round_trip({"ids": {3}}) == {"ids": "{3}"}
+
+
+def test_pydantic_models_are_dumped_in_json_mode():
+    player = Player(name="Ana", born=datetime(2000, 1, 2))
+    assert to_jsonable({"player": player}) == {
+        "player": {"name": "Ana", "born": "2000-01-02T00:00:00"}
+    }
+    assert isinstance(_round_trip({"player": player})["player"], str)
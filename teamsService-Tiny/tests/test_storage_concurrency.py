@@ -0,0 +1,64 @@
+"""Several processes writing one TinyDB file through CachedJSONStorage/SharedTable.
+
+Each worker opens the database on its own, the way every uvicorn worker does,
+and writes with TinyDB's read-modify-write calls. Without the file lock a
+worker would update a stale copy and overwrite the others' writes.
+"""
+import multiprocessing
+
+from tinydb import Query, TinyDB
+
+from teams_app.storage import CachedJSONStorage, SharedTable
+
+PROCESSES = 4
+UPDATES = 200
+
+
+def _open(path: str) -> TinyDB:
+    db = TinyDB(path, storage=CachedJSONStorage)
+    db.table_class = SharedTable
+    return db
+
+
+def _increment(doc):
+    doc["count"] += 1
+
+
+def _worker(path: str, worker: int, start):
+    start.wait()
+    db = _open(path)
+    table = db.table("teams")
+    for i in range(UPDATES):
+        table.update(_increment, Query().id == "counter")
+        table.insert({"id": f"W{worker}-{i}"})
+    db.close()
+
+
+def _run_workers(path: str):
+    ctx = multiprocessing.get_context("spawn")
+    start = ctx.Event()
+    workers = [ctx.Process(target=_worker, args=(path, n, start)) for n in range(PROCESSES)]
+    for process in workers:
+        process.start()
+    start.set()
+    for process in workers:
+        process.join(120)
+        assert process.exitcode == 0
+
+
+def test_concurrent_updates_are_not_lost(tmp_path):
+    path = str(tmp_path / "teams.json")
+    db = _open(path)
+    db.table("teams").insert({"id": "counter", "count": 0})
+    db.close()
+
+    _run_workers(path)
+
+    db = _open(path)
+    table = db.table("teams")
+    assert table.get(Query().id == "counter")["count"] == PROCESSES * UPDATES
+    docs = table.all()
+    assert len(docs) == PROCESSES * UPDATES + 1
+    # doc ids handed out by different processes never collide
+    assert len({doc.doc_id for doc in docs}) == len(docs)
+    db.close()